@@ -1,17 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, abort, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from flask_migrate import Migrate
-from sqlalchemy import or_, and_, desc, asc
+from sqlalchemy import or_, and_, desc, asc, false
+from sqlalchemy.orm import lazyload
 from datetime import datetime
 import os
 
 from config import config
-from models import db, User, Question, Answer, Vote, Tag, Notification, question_tags
+from commands import register_commands
+from hashing import password_hasher
+from view_counter import view_counter
+from cache import response_cache
+from notifications import notification_queue, update_unread_counts
+from tag_index import (
+    tag_index, resolve_tag_ids, set_question_tags, tag_count_deltas, update_tag_counts
+)
+from pagination import keyset_paginate, InvalidCursor
+from conditional import conditional, question_version, is_not_modified, not_modified_response
+from models import (
+    db, User, Question, Answer, Tag, Notification, question_tags, page_answers
+)
+from search import (
+    search_available, ensure_search_index, build_match_query, match_subquery, get_snippets,
+    index_question, remove_question
+)
 from auth import (
     admin_required, get_current_user, sanitize_html, create_notification,
-    login_user, register_user
+    login_user, register_user, init_identity_cache, issue_tokens
 )
+from revocation import revocation_list
+from votes import cast_vote
+from ranking import ranking
+from export import iter_export, iter_gzip, parse_since, parse_tables
+from instrumentation import query_instrumentation
+from metrics import metrics
+from storage import engine_options, apply_sqlite_pragmas, get_status as get_storage_status
+from batch import apply_operations
 
 def create_app(config_name=None):
     app = Flask(__name__)
@@ -21,10 +46,23 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     
     # Initialize extensions
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
+    apply_sqlite_pragmas(app)
     jwt = JWTManager(app)
+    revocation_list.init_app(app, jwt)
     migrate = Migrate(app, db)
     CORS(app, origins=app.config['CORS_ORIGINS'])
+    password_hasher.init_app(app)
+    init_identity_cache(app)
+    view_counter.init_app(app)
+    response_cache.init_app(app)
+    tag_index.init_app(app)
+    notification_queue.init_app(app)
+    ranking.init_app(app)
+    query_instrumentation.init_app(app)
+    metrics.init_app(app)
+    register_commands(app)
     
     # Auth Routes
     @app.route('/api/auth/register', methods=['POST'])
@@ -44,7 +82,7 @@ def create_app(config_name=None):
     @app.route('/api/auth/login', methods=['POST'])
     def login():
         data = request.get_json()
-        print(data)
+        
         if not data or not all(k in data for k in ('username', 'password')):
             return jsonify({'error': 'Username/email and password are required'}), 400
         
@@ -55,30 +93,54 @@ def create_app(config_name=None):
         
         return jsonify(result), 200
     
+    @app.route('/api/auth/refresh', methods=['POST'])
+    @jwt_required(refresh=True)
+    def refresh():
+        user = db.session.get(User, get_jwt_identity())
+        if not user or not user.is_active:
+            return jsonify({'error': 'Invalid credentials'}), 401
+        
+        return jsonify(issue_tokens(user, refresh=False)), 200
+    
     @app.route('/api/auth/me', methods=['GET'])
     @jwt_required()
     def get_current_user_info():
-        current_user = get_current_user()
+        current_user = db.session.get(User, get_jwt_identity())
         if not current_user:
             return jsonify({'error': 'User not found'}), 404
         
         return jsonify({'user': current_user.to_dict()}), 200
     
+    def get_unread_count_for(user_id):
+        return db.session.query(User.unread_notifications).filter_by(id=user_id).scalar() or 0
+    
     # Question Routes
     @app.route('/api/questions', methods=['GET'])
+    @conditional
+    @response_cache.cached('questions')
     def get_questions():
         page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
         search = request.args.get('search', '')
         tags = request.args.getlist('tags')
-        sort_by = request.args.get('sort', 'created_at')
+        sort_by = request.args.get('sort', 'relevance' if search else 'created_at')
         order = request.args.get('order', 'desc')
         
-        # Base query
-        query = Question.query.filter_by(is_active=True)
-        
-        # Search filter
-        if search:
+        # Base query (tags are loaded in bulk by the serializer)
+        query = Question.query.options(lazyload(Question.tags)).filter_by(is_active=True)
+        
+        # Search filter (full-text index when available, LIKE otherwise)
+        match = None
+        fts = None
+        if search and search_available():
+            match = build_match_query(search)
+            if match:
+                fts = match_subquery(match)
+                query = query.join(fts, fts.c.question_id == Question.id)
+            else:
+                # Nothing searchable (only punctuation): no question matches
+                query = query.filter(false())
+        elif search:
             query = query.filter(
                 or_(
                     Question.title.contains(search),
@@ -94,18 +156,34 @@ def create_app(config_name=None):
                     Question.tags.any(Tag.id.in_([tag.id for tag in tag_objects]))
                 )
         
+        # Cursor mode: seek on the sort key instead of OFFSET
+        if 'cursor' in request.args:
+            return keyset_questions(query, sort_by, order, per_page)
+        
         # Sorting
-        if sort_by == 'votes':
-            # Sort by vote score (this is a simplified version)
+        if sort_by == 'relevance' and fts is not None:
+            # bm25 ranks are negative, best match first
             if order == 'desc':
-                query = query.order_by(desc(Question.created_at))  # Placeholder
+                query = query.order_by(asc(fts.c.rank), desc(Question.id))
             else:
-                query = query.order_by(asc(Question.created_at))   # Placeholder
+                query = query.order_by(desc(fts.c.rank), asc(Question.id))
+        elif sort_by == 'votes':
+            if order == 'desc':
+                query = query.order_by(desc(Question.score), desc(Question.id))
+            else:
+                query = query.order_by(asc(Question.score), asc(Question.id))
         elif sort_by == 'views':
             if order == 'desc':
                 query = query.order_by(desc(Question.views))
             else:
                 query = query.order_by(asc(Question.views))
+        elif sort_by in ('hot', 'trending'):
+            # Precomputed, indexed ranks (see ranking.py)
+            rank = Question.hot_score if sort_by == 'hot' else Question.trending_score
+            if order == 'desc':
+                query = query.order_by(desc(rank), desc(Question.id))
+            else:
+                query = query.order_by(asc(rank), asc(Question.id))
         else:  # created_at
             if order == 'desc':
                 query = query.order_by(desc(Question.created_at))
@@ -117,26 +195,90 @@ def create_app(config_name=None):
             page=page, per_page=per_page, error_out=False
         )
         
+        results = Question.serialize_many(questions.items)
+        if match:
+            snippets = get_snippets(match, [q.id for q in questions.items])
+            for result in results:
+                result['snippet'] = snippets.get(result['id'])
+        
         return jsonify({
-            'questions': [q.to_dict() for q in questions.items],
+            'questions': results,
             'total': questions.total,
             'pages': questions.pages,
             'current_page': page,
             'per_page': per_page
         }), 200
     
+    def keyset_questions(query, sort_by, order, per_page):
+        sort_columns = {
+            'created_at': [Question.created_at, Question.id],
+            'views': [Question.views, Question.id],
+            'votes': [Question.score, Question.id],
+            'hot': [Question.hot_score, Question.id],
+            'trending': [Question.trending_score, Question.id],
+        }
+        if sort_by not in sort_columns:
+            return jsonify({
+                'error': 'Cursor pagination supports sort=created_at, views, votes, hot or trending'
+            }), 400
+        
+        try:
+            questions, next_cursor = keyset_paginate(
+                query, sort_columns[sort_by], f'{sort_by}:{order}',
+                cursor=request.args.get('cursor'), per_page=per_page,
+                descending=order == 'desc'
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result = {
+            'questions': Question.serialize_many(questions),
+            'next_cursor': next_cursor,
+            'per_page': per_page
+        }
+        if request.args.get('include_total', '').lower() in ('1', 'true'):
+            result['total'] = query.order_by(None).count()
+        
+        return jsonify(result), 200
+    
+    @response_cache.cached('questions')
+    def render_question(question_id):
+        question = Question.query.options(lazyload(Question.tags)).get_or_404(question_id)
+        
+        if not question.is_active:
+            return jsonify({'error': 'Question not found'}), 404
+        
+        # First page of answers only; the rest come from get_answers
+        return jsonify(question.to_dict(
+            include_answers=True, answers_per_page=app.config['ANSWERS_PER_PAGE']
+        )), 200
+    
     @app.route('/api/questions/<int:question_id>', methods=['GET'])
     def get_question(question_id):
-        question = Question.query.get_or_404(question_id)
+        question = Question.query.options(lazyload(Question.tags)).get_or_404(question_id)
         
         if not question.is_active:
             return jsonify({'error': 'Question not found'}), 404
         
-        # Increment view count
-        question.views += 1
-        db.session.commit()
-        
-        return jsonify(question.to_dict(include_answers=True)), 200
+        # Answer polling clients before serializing anything
+        etag, last_modified = question_version(question)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        response = render_question(question_id)
+        
+        # Count the view; buffered and written in batches off the read path
+        if response.status_code == 200:
+            view_counter.record(question_id)
+            # The cached body's view count can be a cache TTL old; overlay the
+            # live count plus the views still buffered
+            data = response.get_json()
+            data['views'] = (question.views or 0) + view_counter.pending(question_id)
+            response = jsonify(data)
+            response.set_etag(etag)
+            response.last_modified = last_modified
+        
+        return response
     
     @app.route('/api/questions', methods=['POST'])
     @jwt_required()
@@ -164,17 +306,19 @@ def create_app(config_name=None):
             author_id=current_user.id
         )
         
-        # Handle tags
-        for tag_name in data['tags']:
-            tag = Tag.query.filter_by(name=tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.session.add(tag)
-            question.tags.append(tag)
-        
         db.session.add(question)
         try:
+            db.session.flush()
+            
+            # Handle tags: resolved in bulk and linked without loading Tag rows
+            tag_ids = resolve_tag_ids(data['tags'])
+            set_question_tags(question.id, [], tag_ids)
+            update_tag_counts(tag_count_deltas([], tag_ids))
+            index_question(question)
+            ranking.refresh(db.session, [question.id])
             db.session.commit()
+            response_cache.bump('questions', 'tags')
+            tag_index.refresh_tags(tag_ids)
             return jsonify(question.to_dict()), 201
         except Exception as e:
             db.session.rollback()
@@ -184,7 +328,7 @@ def create_app(config_name=None):
     @jwt_required()
     def update_question(question_id):
         current_user = get_current_user()
-        question = Question.query.get_or_404(question_id)
+        question = Question.query.options(lazyload(Question.tags)).get_or_404(question_id)
         
         if question.author_id != current_user.id and current_user.role != 'admin':
             return jsonify({'error': 'Permission denied'}), 403
@@ -195,19 +339,24 @@ def create_app(config_name=None):
             question.title = data['title'].strip()
         if 'description' in data:
             question.description = sanitize_html(data['description'])
-        if 'tags' in data:
-            question.tags.clear()
-            for tag_name in data['tags']:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                question.tags.append(tag)
         
         question.updated_at = datetime.utcnow()
         
+        old_tag_ids = {tag_id for (tag_id,) in db.session.query(question_tags.c.tag_id)
+                       .filter(question_tags.c.question_id == question.id)}
+        
         try:
+            new_tag_ids = old_tag_ids
+            if 'tags' in data:
+                new_tag_ids = set(resolve_tag_ids(data['tags']))
+                set_question_tags(question.id, old_tag_ids, new_tag_ids)
+            
+            deltas = tag_count_deltas(old_tag_ids, new_tag_ids) if question.is_active else {}
+            update_tag_counts(deltas)
+            index_question(question)
             db.session.commit()
+            response_cache.bump('questions', 'tags')
+            tag_index.refresh_tags(new_tag_ids | set(deltas))
             return jsonify(question.to_dict()), 200
         except Exception as e:
             db.session.rollback()
@@ -222,15 +371,45 @@ def create_app(config_name=None):
         if question.author_id != current_user.id and current_user.role != 'admin':
             return jsonify({'error': 'Permission denied'}), 403
         
+        tag_ids = {tag.id for tag in question.tags}
+        if question.is_active:
+            update_tag_counts(tag_count_deltas(tag_ids, []))
+        
         question.is_active = False
         try:
+            remove_question(question.id)
             db.session.commit()
+            response_cache.bump('questions', 'tags')
+            tag_index.refresh_tags(tag_ids)
             return jsonify({'message': 'Question deleted successfully'}), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to delete question'}), 500
     
     # Answer Routes
+    @app.route('/api/questions/<int:question_id>/answers', methods=['GET'])
+    @conditional
+    @response_cache.cached('questions')
+    def get_answers(question_id):
+        per_page = max(min(request.args.get('per_page', app.config['ANSWERS_PER_PAGE'], type=int), 100), 1)
+        
+        is_active = db.session.query(Question.is_active).filter_by(id=question_id).scalar()
+        if not is_active:
+            return jsonify({'error': 'Question not found'}), 404
+        
+        try:
+            answers, next_cursor = page_answers(
+                question_id, cursor=request.args.get('cursor'), per_page=per_page
+            )
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'answers': Answer.serialize_many(answers),
+            'next_cursor': next_cursor,
+            'per_page': per_page
+        }), 200
+    
     @app.route('/api/questions/<int:question_id>/answers', methods=['POST'])
     @jwt_required()
     def create_answer(question_id):
@@ -258,7 +437,10 @@ def create_app(config_name=None):
         db.session.add(answer)
         
         try:
+            db.session.flush()
+            ranking.refresh(db.session, [question_id])
             db.session.commit()
+            response_cache.bump('questions')
             
             # Create notification for question author
             if question.author_id != current_user.id:
@@ -291,6 +473,7 @@ def create_app(config_name=None):
         
         try:
             db.session.commit()
+            response_cache.bump('questions')
             return jsonify(answer.to_dict()), 200
         except Exception as e:
             db.session.rollback()
@@ -315,6 +498,7 @@ def create_app(config_name=None):
         
         try:
             db.session.commit()
+            response_cache.bump('questions')
             
             # Create notification for answer author
             if answer.author_id != current_user.id:
@@ -335,7 +519,6 @@ def create_app(config_name=None):
     @jwt_required()
     def vote_question(question_id):
         current_user = get_current_user()
-        question = Question.query.get_or_404(question_id)
         
         data = request.get_json()
         if not data or 'value' not in data or data['value'] not in [-1, 0, 1]:
@@ -343,44 +526,28 @@ def create_app(config_name=None):
         
         vote_value = data['value']
         
-        # Find existing vote
-        existing_vote = Vote.query.filter_by(
-            user_id=current_user.id,
-            question_id=question_id
-        ).first()
-        
-        if vote_value == 0:
-            # Remove vote
-            if existing_vote:
-                db.session.delete(existing_vote)
-        else:
-            if existing_vote:
-                # Update existing vote
-                existing_vote.value = vote_value
-            else:
-                # Create new vote
-                vote = Vote(
-                    user_id=current_user.id,
-                    question_id=question_id,
-                    value=vote_value
-                )
-                db.session.add(vote)
-        
         try:
-            db.session.commit()
-            return jsonify({
-                'vote_score': question.get_vote_score(),
-                'user_vote': vote_value
-            }), 200
+            # Upserts (or removes) the vote and applies the score delta
+            score = cast_vote(current_user.id, Question, question_id, vote_value or None)
+            if score is not None:
+                ranking.refresh(db.session, [question_id])
+                db.session.commit()
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to vote'}), 500
+        
+        if score is None:
+            abort(404)
+        response_cache.bump('questions')
+        return jsonify({
+            'vote_score': score,
+            'user_vote': vote_value
+        }), 200
     
     @app.route('/api/answers/<int:answer_id>/vote', methods=['POST'])
     @jwt_required()
     def vote_answer(answer_id):
         current_user = get_current_user()
-        answer = Answer.query.get_or_404(answer_id)
 
         data = request.get_json()
         if not data or 'vote' not in data or data['vote'] not in ['up', 'down', 'remove']:
@@ -389,48 +556,36 @@ def create_app(config_name=None):
         vote_type = data['vote']
         vote_value = 1 if vote_type == 'up' else 0  # down/remove treated the same for now
 
-        existing_vote = Vote.query.filter_by(
-            user_id=current_user.id,
-            answer_id=answer_id
-        ).first()
-
-        if vote_type == 'remove':
-            if existing_vote:
-                db.session.delete(existing_vote)
-        else:
-            if existing_vote:
-                existing_vote.value = vote_value
-            else:
-                new_vote = Vote(
-                    user_id=current_user.id,
-                    answer_id=answer_id,
-                    value=vote_value
-                )
-                db.session.add(new_vote)
-
         try:
-            db.session.commit()
-            return jsonify({
-                'vote_score': answer.get_vote_score(),
-                'user_vote': vote_value
-            }), 200
+            score = cast_vote(
+                current_user.id, Answer, answer_id,
+                None if vote_type == 'remove' else vote_value
+            )
+            if score is not None:
+                db.session.commit()
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to vote'}), 500
 
+        if score is None:
+            abort(404)
+        response_cache.bump('questions')
+        return jsonify({
+            'vote_score': score,
+            'user_vote': vote_value
+        }), 200
+
     
     # Tag Routes
     @app.route('/api/tags', methods=['GET'])
+    @conditional
+    @response_cache.cached('tags')
     def get_tags():
         search = request.args.get('search', '')
         limit = min(request.args.get('limit', 50, type=int), 100)
         
-        query = Tag.query
-        if search:
-            query = query.filter(Tag.name.contains(search))
-        
-        tags = query.limit(limit).all()
-        return jsonify([tag.to_dict() for tag in tags]), 200
+        # Prefix match served from the in-memory index
+        return jsonify(tag_index.search(search, limit)), 200
     
     # Notification Routes
     @app.route('/api/notifications', methods=['GET'])
@@ -438,20 +593,47 @@ def create_app(config_name=None):
     def get_notifications():
         current_user = get_current_user()
         page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        per_page = max(min(request.args.get('per_page', 20, type=int), 100), 1)
+        
+        query = Notification.query.filter_by(user_id=current_user.id)
         
-        notifications = Notification.query.filter_by(user_id=current_user.id)\
-            .order_by(desc(Notification.created_at))\
+        if 'cursor' in request.args:
+            try:
+                notifications, next_cursor = keyset_paginate(
+                    query, [Notification.created_at, Notification.id], 'created_at:desc',
+                    cursor=request.args.get('cursor'), per_page=per_page
+                )
+            except InvalidCursor as e:
+                return jsonify({'error': str(e)}), 400
+            
+            result = {
+                'notifications': [n.to_dict() for n in notifications],
+                'next_cursor': next_cursor,
+                'unread_count': get_unread_count_for(current_user.id)
+            }
+            if request.args.get('include_total', '').lower() in ('1', 'true'):
+                result['total'] = query.count()
+            return jsonify(result), 200
+        
+        notifications = query.order_by(desc(Notification.created_at))\
             .paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
             'notifications': [n.to_dict() for n in notifications.items],
             'total': notifications.total,
-            'unread_count': Notification.query.filter_by(
-                user_id=current_user.id, is_read=False
-            ).count()
+            'unread_count': get_unread_count_for(current_user.id)
         }), 200
     
+    @app.route('/api/notifications/unread-count', methods=['GET'])
+    @jwt_required()
+    def get_unread_count():
+        unread = db.session.query(User.unread_notifications)\
+            .filter_by(id=get_jwt_identity()).scalar()
+        if unread is None:
+            return jsonify({'error': 'User not found'}), 404
+        
+        return jsonify({'unread_count': unread}), 200
+    
     @app.route('/api/notifications/<int:notification_id>/read', methods=['POST'])
     @jwt_required()
     def mark_notification_read(notification_id):
@@ -460,7 +642,10 @@ def create_app(config_name=None):
             id=notification_id, user_id=current_user.id
         ).first_or_404()
         
-        notification.is_read = True
+        # Conditional update so concurrent reads only decrement the counter once
+        marked = Notification.query.filter_by(id=notification_id, is_read=False)\
+            .update({'is_read': True})
+        update_unread_counts(db.session, {current_user.id: -marked})
         
         try:
             db.session.commit()
@@ -474,8 +659,9 @@ def create_app(config_name=None):
     def mark_all_notifications_read():
         current_user = get_current_user()
         
-        Notification.query.filter_by(user_id=current_user.id, is_read=False)\
+        marked = Notification.query.filter_by(user_id=current_user.id, is_read=False)\
             .update({'is_read': True})
+        update_unread_counts(db.session, {current_user.id: -marked})
         
         try:
             db.session.commit()
@@ -484,6 +670,33 @@ def create_app(config_name=None):
             db.session.rollback()
             return jsonify({'error': 'Failed to mark notifications as read'}), 500
     
+    # Batch Routes
+    @app.route('/api/batch', methods=['POST'])
+    @jwt_required()
+    def apply_batch():
+        """Replay queued votes and notification reads in one transaction"""
+        current_user = get_current_user()
+        
+        data = request.get_json()
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        
+        max_operations = app.config['BATCH_MAX_OPERATIONS']
+        if len(operations) > max_operations:
+            return jsonify({'error': f'A batch can hold at most {max_operations} operations'}), 400
+        
+        try:
+            results = apply_operations(current_user.id, operations)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': 'Failed to apply batch'}), 500
+        
+        if any('vote_score' in result for result in results):
+            response_cache.bump('questions')
+        return jsonify({'results': results}), 200
+    
     # Admin Routes
     @app.route('/api/admin/users', methods=['GET'])
     @admin_required
@@ -507,14 +720,87 @@ def create_app(config_name=None):
     def admin_ban_user(user_id):
         user = User.query.get_or_404(user_id)
         user.is_active = False
+        revocation_list.revoke(user)
         
         try:
             db.session.commit()
+            revocation_list.remember(user.id, user.token_version)
+            response_cache.bump('questions')
             return jsonify({'message': 'User banned successfully'}), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to ban user'}), 500
     
+    @app.route('/api/admin/view-counter', methods=['GET'])
+    @admin_required
+    def admin_get_view_counter():
+        return jsonify(view_counter.get_status()), 200
+    
+    @app.route('/api/admin/view-counter', methods=['PUT'])
+    @admin_required
+    def admin_update_view_counter():
+        data = request.get_json() or {}
+        
+        try:
+            view_counter.configure(
+                flush_interval=data.get('flush_interval'),
+                max_pending=data.get('max_pending')
+            )
+        except (TypeError, ValueError):
+            return jsonify({'error': 'flush_interval and max_pending must be numbers'}), 400
+        
+        if data.get('flush'):
+            view_counter.flush()
+        
+        return jsonify(view_counter.get_status()), 200
+    
+    @app.route('/api/admin/export', methods=['GET'])
+    @admin_required
+    def admin_export():
+        """Stream questions, answers and votes as NDJSON (?tables=, ?since=, ?gzip=1)"""
+        try:
+            tables = parse_tables(request.args.get('tables'))
+            since = parse_since(request.args.get('since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        lines = iter_export(tables, since)
+        filename = 'stackit-export.ndjson'
+        if request.args.get('gzip', '').lower() in ('1', 'true'):
+            body, mimetype, filename = iter_gzip(lines), 'application/gzip', filename + '.gz'
+        else:
+            body, mimetype = lines, 'application/x-ndjson'
+        
+        return Response(
+            stream_with_context(body), mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    
+    @app.route('/api/admin/slow-queries', methods=['GET'])
+    @admin_required
+    def admin_slow_queries():
+        return jsonify(query_instrumentation.get_status()), 200
+    
+    @app.route('/api/admin/ranking', methods=['GET'])
+    @admin_required
+    def admin_ranking_status():
+        return jsonify(ranking.get_status()), 200
+    
+    @app.route('/api/admin/cache', methods=['GET'])
+    @admin_required
+    def admin_get_cache_stats():
+        return jsonify(response_cache.get_stats()), 200
+    
+    @app.route('/api/admin/notification-queue', methods=['GET'])
+    @admin_required
+    def admin_get_notification_queue():
+        return jsonify(notification_queue.get_status()), 200
+    
+    @app.route('/api/admin/storage', methods=['GET'])
+    @admin_required
+    def admin_get_storage_status():
+        return jsonify(get_storage_status()), 200
+    
     # Health check
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -523,6 +809,12 @@ def create_app(config_name=None):
             'timestamp': datetime.utcnow().isoformat()
         }), 200
     
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        if not metrics.enabled:
+            abort(404)
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    
     return app
 
 if __name__ == '__main__':
@@ -530,6 +822,7 @@ if __name__ == '__main__':
     
     with app.app_context():
         db.create_all()
+        ensure_search_index()
         
         # Create default admin user if doesn't exist
         admin = User.query.filter_by(username='admin').first()
@@ -1,51 +1,139 @@
+from collections import namedtuple
 from functools import wraps
+import hashlib
+import threading
 from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token, create_refresh_token
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token, create_refresh_token
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from models import User, db
-import bleach
+from revocation import revocation_list
+from cache import LRUCache
+from bleach.sanitizer import Cleaner
+
+# Fields handlers need about the caller, cached per process by JWT identity
+CurrentUser = namedtuple('CurrentUser', ['id', 'username', 'role', 'is_active'])
+
+identity_cache = LRUCache(max_entries=10000, ttl=30)
+
+def init_identity_cache(app):
+    """Size the identity cache from config"""
+    identity_cache.max_entries = app.config.get('IDENTITY_CACHE_SIZE', identity_cache.max_entries)
+    identity_cache.ttl = app.config.get('IDENTITY_CACHE_TTL', identity_cache.ttl)
+    identity_cache.clear()
+
+def load_identity(user_id):
+    """Get the cached identity for a user id, loading it on a miss"""
+    if user_id is None:
+        return None
+    
+    identity = identity_cache.get(user_id)
+    if identity is None:
+        row = db.session.query(User.id, User.username, User.role, User.is_active)\
+            .filter_by(id=user_id).first()
+        if row is None:
+            return None
+        identity = CurrentUser(*row)
+        identity_cache.set(user_id, identity)
+    return identity
+
+def invalidate_identity(user_id):
+    """Drop a cached identity so the next request reloads it"""
+    identity_cache.delete(user_id)
+
+@event.listens_for(User, 'after_update')
+def _track_user_update(mapper, connection, target):
+    # Role or status changes take effect once the change commits
+    object_session(target).info.setdefault('updated_user_ids', set()).add(target.id)
+
+@event.listens_for(Session, 'before_flush')
+def _revoke_on_role_change(session, flush_context, instances):
+    # Tokens carry the role claim, so a role change revokes them
+    for user in session.dirty:
+        if isinstance(user, User) and inspect(user).attrs.role.history.has_changes():
+            revocation_list.revoke(user, session)
+            session.info.setdefault('revoked_versions', {})[user.id] = user.token_version
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_updated_users(session):
+    for user_id in session.info.pop('updated_user_ids', ()):
+        invalidate_identity(user_id)
+    for user_id, min_version in session.info.pop('revoked_versions', {}).items():
+        revocation_list.remember(user_id, min_version)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_revocations(session):
+    session.info.pop('revoked_versions', None)
 
 def admin_required(f):
     """Decorator to require admin role"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        # Role comes from the token; bans and role changes revoke the token,
+        # so no query is needed
+        role = get_jwt().get('role')
+        if role is None:
+            # Token issued before role claims existed
+            current_user = load_identity(get_jwt_identity())
+            role = current_user.role if current_user else None
         
-        if not current_user or current_user.role != 'admin':
+        if role != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
             
         return f(*args, **kwargs)
     return decorated_function
 
 def get_current_user():
-    """Get current user from JWT token"""
-    try:
-        current_user_id = get_jwt_identity()
-        print("Current Id:",current_user_id)
-        if current_user_id:
-            return User.query.get(current_user_id)
-    except:
-        print(current_user_id)
-    return None
+    """Get the current user's identity (id, username, role, is_active) from JWT token"""
+    return load_identity(get_jwt_identity())
+
+ALLOWED_TAGS = frozenset([
+    'p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li', 'h1', 'h2', 'h3', 
+    'h4', 'h5', 'h6', 'blockquote', 'code', 'pre', 'a', 'img'
+])
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'img': ['src', 'alt', 'width', 'height'],
+    '*': ['class']
+}
+
+# Cleaners aren't thread-safe, so each thread builds one and keeps it
+_local = threading.local()
+
+# Sanitized output keyed by content hash, so re-submitted edits skip bleach
+sanitize_cache = LRUCache(max_entries=2048, ttl=24 * 3600)
+
+def get_cleaner():
+    """Get this thread's prebuilt Cleaner"""
+    cleaner = getattr(_local, 'cleaner', None)
+    if cleaner is None:
+        cleaner = _local.cleaner = Cleaner(
+            tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True
+        )
+    return cleaner
 
 def sanitize_html(content):
     """Sanitize HTML content to prevent XSS"""
-    allowed_tags = [
-        'p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li', 'h1', 'h2', 'h3', 
-        'h4', 'h5', 'h6', 'blockquote', 'code', 'pre', 'a', 'img'
-    ]
-    allowed_attributes = {
-        'a': ['href', 'title'],
-        'img': ['src', 'alt', 'width', 'height'],
-        '*': ['class']
-    }
-    
-    return bleach.clean(content, tags=allowed_tags, attributes=allowed_attributes, strip=True)
+    key = hashlib.sha256(content.encode('utf-8')).digest()
+    cleaned = sanitize_cache.get(key)
+    if cleaned is None:
+        cleaned = get_cleaner().clean(content)
+        sanitize_cache.set(key, cleaned)
+    return cleaned
 
 def create_notification(user_id, notification_type, message, data=None):
-    """Helper function to create notifications"""
+    """Helper function to create notifications.
+    
+    Queued for the background writer unless NOTIFICATIONS_ASYNC is off, in
+    which case the notification is committed immediately and returned.
+    """
     from models import Notification
+    from notifications import notification_queue, update_unread_counts
+    
+    if notification_queue.async_mode:
+        notification_queue.enqueue(user_id, notification_type, message, data)
+        return None
     
     notification = Notification(
         user_id=user_id,
@@ -55,6 +143,7 @@ def create_notification(user_id, notification_type, message, data=None):
     )
     
     db.session.add(notification)
+    update_unread_counts(db.session, {user_id: 1})
     try:
         db.session.commit()
         return notification
@@ -62,6 +151,14 @@ def create_notification(user_id, notification_type, message, data=None):
         db.session.rollback()
         return None
 
+def issue_tokens(user, refresh=True):
+    """Create tokens carrying the user's role and token version as claims"""
+    claims = {'role': user.role, 'ver': user.token_version or 0}
+    tokens = {'access_token': create_access_token(identity=user.id, additional_claims=claims)}
+    if refresh:
+        tokens['refresh_token'] = create_refresh_token(identity=user.id, additional_claims=claims)
+    return tokens
+
 def validate_password(password):
     """Validate password strength"""
     if len(password) < 6:
@@ -99,13 +196,17 @@ def login_user(username_or_email, password):
     if not user.check_password(password):
         return None, "Invalid credentials"
     
-    # Create tokens
-    access_token = create_access_token(identity=user.id)
-    refresh_token = create_refresh_token(identity=user.id)
+    # Upgrade hashes made with an old work factor while we have the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
     
+    # Create tokens
     return {
-        'access_token': access_token,
-        'refresh_token': refresh_token,
+        **issue_tokens(user),
         'user': user.to_dict()
     }, None
 
@@ -140,12 +241,8 @@ def register_user(username, email, password):
         db.session.commit()
         
         # Create tokens
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
-        
         return {
-            'access_token': access_token,
-            'refresh_token': refresh_token,
+            **issue_tokens(user),
             'user': user.to_dict()
         }, None
         
@@ -0,0 +1,96 @@
+"""
+Batch ingestion
+Replays a client's queued votes and notification reads in one request and one
+transaction, returning a result for each operation in order.
+
+Operations mirror the single-item endpoints:
+  {"type": "question_vote", "question_id": 1, "value": -1 | 0 | 1}
+  {"type": "answer_vote", "answer_id": 1, "vote": "up" | "down" | "remove"}
+  {"type": "notification_read", "notification_id": 1}
+"""
+
+from models import db, Question, Answer
+from notifications import mark_notifications_read
+from ranking import ranking
+from votes import cast_votes
+
+# Answer vote -> stored value; down/remove treated the same as /api/answers/<id>/vote
+ANSWER_VOTES = {'up': 1, 'down': 0, 'remove': None}
+
+VOTE_TYPES = {'question_vote': (Question, 'question_id'), 'answer_vote': (Answer, 'answer_id')}
+
+
+def _get_id(operation, field):
+    value = operation.get(field)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        raise ValueError(f'{field} must be a positive integer')
+    return value
+
+
+def parse_operation(operation):
+    """Validate one operation; returns (type, target_id, value) or raises ValueError"""
+    if not isinstance(operation, dict):
+        raise ValueError('Operation must be an object')
+
+    kind = operation.get('type')
+    if kind == 'question_vote':
+        target_id = _get_id(operation, 'question_id')
+        if operation.get('value') not in [-1, 0, 1]:
+            raise ValueError('Vote value must be -1, 0, or 1')
+        return kind, target_id, operation['value'] or None
+    if kind == 'answer_vote':
+        target_id = _get_id(operation, 'answer_id')
+        if operation.get('vote') not in ANSWER_VOTES:
+            raise ValueError('Vote must be "up", "down", or "remove"')
+        return kind, target_id, ANSWER_VOTES[operation['vote']]
+    if kind == 'notification_read':
+        return kind, _get_id(operation, 'notification_id'), None
+    raise ValueError('Unknown operation type')
+
+
+def apply_operations(user_id, operations):
+    """Apply a batch for one user with bulk statements; the caller commits.
+
+    Invalid operations and missing targets get an error result without
+    failing the rest. When the same target appears more than once the last
+    operation wins, as if the batch had been replayed one request at a time.
+    """
+    results = [None] * len(operations)
+    parsed = []
+    for index, operation in enumerate(operations):
+        try:
+            parsed.append((index, *parse_operation(operation)))
+        except ValueError as e:
+            results[index] = {'status': 400, 'error': str(e)}
+
+    votes = {kind: {} for kind in VOTE_TYPES}
+    reads = set()
+    for index, kind, target_id, value in parsed:
+        if kind == 'notification_read':
+            reads.add(target_id)
+        else:
+            votes[kind][target_id] = value
+
+    scores = {
+        kind: cast_votes(user_id, VOTE_TYPES[kind][0], votes[kind]) for kind in VOTE_TYPES
+    }
+    ranking.refresh(db.session, scores['question_vote'])
+    owned = mark_notifications_read(db.session, user_id, reads)
+
+    for index, kind, target_id, value in parsed:
+        if kind == 'notification_read':
+            if target_id in owned:
+                results[index] = {'status': 200, 'notification_id': target_id, 'is_read': True}
+            else:
+                results[index] = {'status': 404, 'error': 'Notification not found'}
+        elif target_id in scores[kind]:
+            results[index] = {
+                'status': 200,
+                VOTE_TYPES[kind][1]: target_id,
+                'vote_score': scores[kind][target_id],
+                'user_vote': value or 0
+            }
+        else:
+            results[index] = {'status': 404, 'error': f'{VOTE_TYPES[kind][0].__name__} not found'}
+
+    return results
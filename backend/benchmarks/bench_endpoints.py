@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark
+Drives the hot API routes through the create_app() test client against
+synthetic databases (generate_data.py) of several sizes, and reports p50/p99
+latency, throughput and SQL statements per request for each route.
+
+Databases are generated once per scale and seed under --db-dir and reused;
+the write routes (vote, answer) change them a little on every run. The
+response cache is off by default so every request runs its handler.
+
+Statements per request come from the app's X-Query-Count header, so the
+view counter's and notification queue's background writes aren't counted.
+
+With --baseline, results are compared with an earlier --json file and the
+script exits non-zero when a route got slower than --threshold or issues
+more queries than before. baseline_endpoints.json next to this script holds
+the reference run (--scales 1000 10000, default settings); latencies only
+compare meaningfully on the same machine, query counts anywhere.
+
+Usage: python benchmarks/bench_endpoints.py --scales 1000 100000 --json results.json
+       python benchmarks/bench_endpoints.py --scales 1000 10000 --baseline benchmarks/baseline_endpoints.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config
+from generate_data import generate, WORDS, TAG_NAMES
+
+
+def corpus_size(questions):
+    """Row counts for a database with this many questions"""
+    return {
+        'users': max(questions // 5, 50),
+        'tags': min(max(questions // 5, 20), 2000),
+        'questions': questions,
+        'answers': questions * 3,
+        'votes': questions * 5,
+        'notifications': questions,
+    }
+
+
+def make_app(db_path, cache):
+    class BenchConfig(config['production']):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        RESPONSE_CACHE_BACKEND = cache
+        RANKING_REDECAY_INTERVAL = 0
+        # Per-request statement counts (X-Query-Count) without background
+        # threads' statements; no slow query logging
+        SQL_INSTRUMENTATION = True
+        SLOW_QUERY_MS = float('inf')
+
+    config['bench'] = BenchConfig
+    return create_app('bench')
+
+
+def prepare(db_dir, questions, seed, cache):
+    db_path = os.path.abspath(os.path.join(db_dir, f'stackit-{questions}-{seed}.db'))
+    app = make_app(db_path, cache)
+    if not os.path.exists(db_path):
+        print(f'Generating {db_path}...')
+        with app.app_context():
+            generate(seed=seed, log=lambda message: None, **corpus_size(questions))
+    return app
+
+
+def scenarios(rng, questions):
+    """Route name -> function returning (method, url, json body or None, auth)"""
+    size = corpus_size(questions)
+    pages = max(min(questions // 20, 50), 1)
+
+    def question_id():
+        # Mostly the head of the corpus, like real traffic on hot questions
+        return min(int(rng.paretovariate(1.2)), questions)
+
+    return {
+        'list': lambda: ('GET', f'/api/questions?page={rng.randint(1, pages)}', None, False),
+        'list_votes': lambda: ('GET', f'/api/questions?sort=votes&page={rng.randint(1, pages)}', None, False),
+        'list_hot': lambda: ('GET', '/api/questions?sort=hot&cursor=', None, False),
+        'search': lambda: ('GET', f'/api/questions?search={rng.choice(WORDS)}+{rng.choice(WORDS)}', None, False),
+        'tag_filter': lambda: ('GET', f'/api/questions?tags={rng.choice(TAG_NAMES[:min(size["tags"], len(TAG_NAMES))])}', None, False),
+        'tags': lambda: ('GET', f'/api/tags?search={rng.choice(TAG_NAMES)[:2]}', None, False),
+        'detail': lambda: ('GET', f'/api/questions/{question_id()}', None, False),
+        'answers': lambda: ('GET', f'/api/questions/{question_id()}/answers?per_page=20', None, False),
+        'vote': lambda: ('POST', f'/api/questions/{rng.randint(1, questions)}/vote',
+                         {'value': rng.choice([-1, 0, 1])}, True),
+        'answer': lambda: ('POST', f'/api/questions/{question_id()}/answers',
+                           {'content': f'<p>{" ".join(rng.choices(WORDS, k=30))}</p>'}, True),
+        'notifications': lambda: ('GET', '/api/notifications', None, True),
+        'admin_users': lambda: ('GET', f'/api/admin/users?page={rng.randint(1, max(size["users"] // 20, 1))}', None, True),
+    }
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def bench_route(client, headers, make_request, requests, warmup):
+    latencies = []
+    statements = 0
+    for i in range(warmup + requests):
+        method, url, body, auth = make_request()
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers=headers if auth else None)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400 and response.status_code != 404:
+            raise RuntimeError(f'{method} {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        if i >= warmup:
+            latencies.append(elapsed)
+            statements += int(response.headers['X-Query-Count'])
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'requests_per_second': round(len(latencies) / sum(latencies), 1),
+        'queries_per_request': round(statements / requests, 2),
+    }
+
+
+def run_scale(app, questions, routes, requests, warmup, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'username': 'user1', 'password': 'password123'})
+    headers = {'Authorization': f'Bearer {response.json["access_token"]}'}
+
+    results = []
+    available = scenarios(rng, questions)
+    for name in routes or available:
+        result = bench_route(client, headers, available[name], requests, warmup)
+        results.append({'scale': questions, 'route': name, **result})
+        print(f"{questions:>8} {name:<14} {result['p50_ms']:>9} {result['p99_ms']:>9} "
+              f"{result['requests_per_second']:>9} {result['queries_per_request']:>8}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline; returns the regressions"""
+    previous = {(row['scale'], row['route']): row for row in baseline['results']}
+    regressions = []
+    print(f"\n{'scale':>8} {'route':<14} {'p50 Δ%':>8} {'p99 Δ%':>8} {'queries':>10}")
+    for row in results:
+        before = previous.get((row['scale'], row['route']))
+        if before is None:
+            continue
+        p50 = (row['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+        p99 = (row['p99_ms'] - before['p99_ms']) / before['p99_ms'] * 100 if before['p99_ms'] else 0
+        queries = f"{before['queries_per_request']}->{row['queries_per_request']}"
+        slower = p50 > threshold * 100
+        more_queries = row['queries_per_request'] > before['queries_per_request'] + 0.5
+        flag = '  REGRESSION' if slower or more_queries else ''
+        print(f"{row['scale']:>8} {row['route']:<14} {p50:>+8.1f} {p99:>+8.1f} {queries:>10}{flag}")
+        if flag:
+            regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 100000],
+                        help='questions per database (e.g. 1000 100000 1000000)')
+    parser.add_argument('--routes', nargs='+', help='subset of routes to run')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cache', choices=['null', 'lru'], default='null', help='response cache backend')
+    parser.add_argument('--db-dir', default=os.path.join(tempfile.gettempdir(), 'stackit-bench'))
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='compare against results from an earlier --json run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 slowdown counted as a regression')
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    results = []
+    print(f"{'scale':>8} {'route':<14} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'queries':>8}")
+    for questions in args.scales:
+        app = prepare(args.db_dir, questions, args.seed, args.cache)
+        results.extend(run_scale(app, questions, args.routes, args.requests, args.warmup, args.seed))
+
+    output = {
+        'meta': {
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'cache': args.cache,
+            'python': sys.version.split()[0],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
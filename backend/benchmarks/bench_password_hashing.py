@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark
+Reports login verifications per second for each bcrypt work factor and
+hashing pool size, with concurrent request threads driving the hasher.
+
+Usage: python benchmarks/bench_password_hashing.py --rounds 10 12 --workers 0 2 4
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import PasswordHasher
+
+
+def bench(rounds, workers, logins, threads):
+    hasher = PasswordHasher(rounds=rounds, workers=workers)
+    hashed = hasher.hash('password123')
+    hasher.check('password123', hashed)  # warm up the pool
+
+    def login(_):
+        started = time.perf_counter()
+        assert hasher.check('password123', hashed)
+        return time.perf_counter() - started
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+
+    return {
+        'rounds': rounds,
+        'workers': workers,
+        'threads': threads,
+        'logins': logins,
+        'seconds': round(elapsed, 3),
+        'logins_per_second': round(logins / elapsed, 1),
+        'avg_latency_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, os.cpu_count() or 1])
+    parser.add_argument('--logins', type=int, default=64, help='verifications per run')
+    parser.add_argument('--threads', type=int, default=16, help='concurrent request threads')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rounds':>6} {'workers':>7} {'logins/s':>10} {'avg ms':>9}")
+    for rounds in args.rounds:
+        for workers in sorted(set(args.workers)):
+            result = bench(rounds, workers, args.logins, args.threads)
+            results.append(result)
+            print(f"{rounds:>6} {workers:>7} {result['logins_per_second']:>10} {result['avg_latency_ms']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
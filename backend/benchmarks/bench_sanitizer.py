@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+HTML sanitizer benchmark
+Measures sanitize_html throughput over the sample question and answer bodies
+from init_db.py, plus a large answer built from them:
+
+  bleach.clean   - the old per-call path (new Cleaner every call)
+  cleaner        - the prebuilt per-thread Cleaner, cache cleared every call
+  cached         - re-submitted bodies answered from the content-hash LRU
+
+Usage: python benchmarks/bench_sanitizer.py --iterations 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bleach
+
+from auth import ALLOWED_TAGS, ALLOWED_ATTRIBUTES, sanitize_html, sanitize_cache
+from init_db import SAMPLE_QUESTIONS, SAMPLE_ANSWERS
+
+
+def sample_bodies():
+    bodies = [q['description'] for q in SAMPLE_QUESTIONS] + [a['content'] for a in SAMPLE_ANSWERS]
+    # A long answer with several code blocks, like the heaviest real posts
+    bodies.append('\n'.join(a['content'] for a in SAMPLE_ANSWERS) * 10)
+    return bodies
+
+
+def run(name, fn, bodies, iterations):
+    total_bytes = sum(len(body.encode('utf-8')) for body in bodies) * iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for body in bodies:
+            fn(body)
+    elapsed = time.perf_counter() - start
+    calls = len(bodies) * iterations
+    return {
+        'mode': name,
+        'calls': calls,
+        'seconds': round(elapsed, 3),
+        'calls_per_second': round(calls / elapsed, 1),
+        'mb_per_second': round(total_bytes / elapsed / 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    bodies = sample_bodies()
+
+    def uncached(body):
+        sanitize_cache.clear()
+        return sanitize_html(body)
+
+    def legacy(body):
+        return bleach.clean(body, tags=list(ALLOWED_TAGS), attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+    results = [
+        run('bleach.clean', legacy, bodies, args.iterations),
+        run('cleaner', uncached, bodies, args.iterations),
+        run('cached', sanitize_html, bodies, args.iterations),
+    ]
+
+    print(f"{'mode':<14} {'calls/s':>10} {'MB/s':>8}")
+    for result in results:
+        print(f"{result['mode']:<14} {result['calls_per_second']:>10} {result['mb_per_second']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+SQLite read/write concurrency benchmark
+Runs reader threads (question list and detail) alongside writer threads
+(votes and new answers) through the create_app() test client for a fixed
+time, once per storage profile, and reports throughput, latency and failed
+requests ("database is locked" surfaces as a 500) for reads and writes.
+
+Profiles:
+  default     SQLite's defaults: rollback journal, synchronous=FULL,
+              SQLAlchemy's default pool
+  production  ProductionConfig: WAL, synchronous=NORMAL, busy_timeout,
+              mmap and a larger page cache, sized pool
+
+A synthetic database (generate_data.py) is generated once under --db-dir
+and every profile runs against a fresh copy of it.
+
+Usage: python benchmarks/bench_sqlite_concurrency.py --readers 8 --writers 2 --duration 10
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config import config, Config, ProductionConfig
+from generate_data import generate, WORDS
+
+PROFILES = {
+    'default': {
+        'SQLITE_PRAGMAS': Config.SQLITE_PRAGMAS,
+        'DB_POOL_SIZE': None,
+        'DB_MAX_OVERFLOW': None,
+        'DB_POOL_TIMEOUT': None,
+        'DB_POOL_RECYCLE': None,
+    },
+    'production': {
+        'SQLITE_PRAGMAS': ProductionConfig.SQLITE_PRAGMAS,
+        'DB_POOL_SIZE': ProductionConfig.DB_POOL_SIZE,
+        'DB_MAX_OVERFLOW': ProductionConfig.DB_MAX_OVERFLOW,
+        'DB_POOL_TIMEOUT': ProductionConfig.DB_POOL_TIMEOUT,
+        'DB_POOL_RECYCLE': ProductionConfig.DB_POOL_RECYCLE,
+    },
+}
+
+
+def make_app(db_path, profile):
+    settings = dict(PROFILES[profile])
+    settings.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_path}',
+        SQLALCHEMY_ENGINE_OPTIONS={},
+        RESPONSE_CACHE_BACKEND='null',
+        RANKING_REDECAY_INTERVAL=0,
+        METRICS_DIR=None,
+    )
+    config['bench'] = type('BenchConfig', (config['production'],), settings)
+    return create_app('bench')
+
+
+def prepare(db_dir, questions, seed):
+    """Path of the generated base database, in rollback journal mode"""
+    db_path = os.path.abspath(os.path.join(db_dir, f'concurrency-{questions}-{seed}.db'))
+    if not os.path.exists(db_path):
+        print(f'Generating {db_path}...')
+        app = make_app(db_path, 'default')
+        with app.app_context():
+            generate(users=max(questions // 5, 50), tags=min(max(questions // 5, 20), 2000),
+                     questions=questions, answers=questions * 3, votes=questions * 5,
+                     notifications=questions, seed=seed, log=lambda message: None)
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+    return db_path
+
+
+def copy_database(base_path, profile):
+    path = base_path.replace('.db', f'-{profile}.db')
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.copyfile(base_path, path)
+    return path
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def worker(app, make_request, headers, deadline, samples):
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        method, url, body = make_request()
+        started = time.perf_counter()
+        response = client.open(url, method=method, json=body, headers=headers)
+        samples.append((time.perf_counter() - started, response.status_code))
+
+
+def summarize(samples, duration):
+    latencies = sorted(elapsed for elapsed, status in samples if status < 500)
+    failed = sum(1 for elapsed, status in samples if status >= 500)
+    return {
+        'requests': len(samples),
+        'per_second': round(len(latencies) / duration, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'failed': failed,
+    }
+
+
+def run_profile(base_path, profile, questions, readers, writers, duration, seed):
+    app = make_app(copy_database(base_path, profile), profile)
+    client = app.test_client()
+    tokens = []
+    for i in range(writers):
+        response = client.post('/api/auth/login', json={'username': f'user{i + 2}', 'password': 'password123'})
+        tokens.append({'Authorization': f'Bearer {response.json["access_token"]}'})
+
+    def reader(rng):
+        def make_request():
+            if rng.random() < 0.5:
+                return 'GET', f'/api/questions?page={rng.randint(1, 20)}', None
+            return 'GET', f'/api/questions/{rng.randint(1, questions)}', None
+        return make_request
+
+    def writer(rng):
+        def make_request():
+            question_id = rng.randint(1, questions)
+            if rng.random() < 0.8:
+                return 'POST', f'/api/questions/{question_id}/vote', {'value': rng.choice([-1, 1])}
+            return 'POST', f'/api/questions/{question_id}/answers', {'content': f'<p>{" ".join(rng.choices(WORDS, k=30))}</p>'}
+        return make_request
+
+    read_samples, write_samples = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=worker, args=(app, reader(random.Random(seed + i)), None, deadline, read_samples))
+        for i in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=(app, writer(random.Random(-seed - i)), tokens[i], deadline, write_samples))
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {'profile': profile, 'reads': summarize(read_samples, duration), 'writes': summarize(write_samples, duration)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=10000, help='questions in the generated database')
+    parser.add_argument('--readers', type=int, default=8, help='reader threads')
+    parser.add_argument('--writers', type=int, default=2, help='writer threads')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per profile')
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db-dir', default=os.path.join(tempfile.gettempdir(), 'stackit-bench'))
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    os.makedirs(args.db_dir, exist_ok=True)
+    base_path = prepare(args.db_dir, args.questions, args.seed)
+
+    results = []
+    print(f"{'profile':<11} {'kind':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} {'failed':>7}")
+    for profile in args.profiles:
+        result = run_profile(base_path, profile, args.questions, args.readers, args.writers, args.duration, args.seed)
+        results.append(result)
+        for kind in ('reads', 'writes'):
+            row = result[kind]
+            print(f"{profile:<11} {kind:<6} {row['per_second']:>8} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+                  f"{row['max_ms']:>9} {row['failed']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'meta': {
+                    'questions': args.questions,
+                    'readers': args.readers,
+                    'writers': args.writers,
+                    'duration': args.duration,
+                    'seed': args.seed,
+                    'sqlite': sqlite3.sqlite_version,
+                    'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                },
+                'results': results,
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
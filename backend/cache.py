@@ -0,0 +1,154 @@
+"""
+Response cache for public read endpoints
+Entries are keyed by path, normalized query args and generation counters;
+write handlers bump a generation instead of hunting down stale keys.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+
+class LRUCache:
+    """In-process LRU backend with size-bounded eviction and a TTL"""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'ttl': self.ttl, **self.stats}
+
+
+class NullCache:
+    """Backend that never stores anything"""
+
+    def __init__(self, **options):
+        pass
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def get_stats(self):
+        return {}
+
+
+BACKENDS = {
+    'lru': LRUCache,
+    'null': NullCache,
+}
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self._generations = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_class = BACKENDS[app.config.get('RESPONSE_CACHE_BACKEND', 'lru')]
+        self.backend = backend_class(**app.config.get('RESPONSE_CACHE_OPTIONS', {}))
+        app.extensions['response_cache'] = self
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump(self, *namespaces):
+        """Invalidate every cached response that depends on these namespaces"""
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def make_key(self, namespaces):
+        args = '&'.join(
+            f'{name}={value}' for name, value in sorted(request.args.items(multi=True))
+        )
+        generations = ','.join(f'{ns}:{self.generation(ns)}' for ns in namespaces)
+        return f'{request.path}?{args}|{generations}'
+
+    def cached(self, *namespaces):
+        """Cache successful GET responses of a view under the given namespaces"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if request.method != 'GET':
+                    return f(*args, **kwargs)
+
+                key = self.make_key(namespaces)
+                hit = self.backend.get(key)
+                if hit is not None:
+                    body, content_type = hit
+                    return make_response(body, 200, {'Content-Type': content_type})
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(key, (response.get_data(), response.content_type))
+                return response
+            return decorated_function
+        return decorator
+
+    def get_stats(self):
+        stats = self.backend.get_stats()
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        return {
+            'backend': type(self.backend).__name__,
+            'hit_ratio': stats.get('hits', 0) / lookups if lookups else None,
+            'generations': dict(self._generations),
+            **stats
+        }
+
+
+response_cache = ResponseCache()
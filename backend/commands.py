@@ -0,0 +1,133 @@
+"""
+Maintenance commands for StackIt
+Registered on the Flask CLI, e.g. `flask reconcile-scores`
+"""
+
+import click
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+from models import db, User, Question, Answer, Vote, Tag, Notification
+from search import rebuild_search_index
+from tag_index import reconcile_tag_counts
+from notifications import reconcile_unread_counts
+from votes import dedupe_votes
+from ranking import ranking
+
+
+def ensure_columns(model):
+    """Add columns and indexes declared on a model but missing from an existing table"""
+    table = model.__table__
+    inspector = inspect(db.engine)
+    if not inspector.has_table(table.name):
+        return []
+
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    added = []
+    with db.engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+            added.append(column.name)
+
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+    return added
+
+
+def reconcile_vote_scores():
+    """Recompute stored question/answer scores from the vote table.
+
+    Returns the number of questions and answers whose stored score was wrong.
+    """
+    fixed = {}
+    for model, fk in ((Question, 'question_id'), (Answer, 'answer_id')):
+        table = model.__table__.name
+        # One GROUP BY pass over the votes, looked up per row; a per-row SUM
+        # would scan the vote table for every row, since no vote index leads
+        # with the question or answer foreign key
+        totals = (
+            f'SELECT vote.{fk} AS target_id, SUM(vote.value) AS total FROM vote '
+            f'WHERE vote.{fk} IS NOT NULL GROUP BY vote.{fk}'
+        )
+        actual = f'COALESCE((SELECT totals.total FROM ({totals}) AS totals WHERE totals.target_id = {table}.id), 0)'
+        result = db.session.execute(text(
+            f'UPDATE {table} SET score = {actual} WHERE score IS NULL OR score <> {actual}'
+        ))
+        fixed[table] = result.rowcount
+    db.session.commit()
+    return fixed
+
+
+def register_commands(app):
+    @app.cli.command('sync-schema')
+    def sync_schema_command():
+        """Create missing tables, columns and indexes on an existing database."""
+        db.create_all()
+        for model in (User, Question, Answer, Vote, Tag, Notification):
+            try:
+                added = ensure_columns(model)
+            except IntegrityError:
+                raise click.ClickException(
+                    f'Duplicate rows block the unique indexes on {model.__tablename__}; '
+                    'run `flask dedupe-votes` first'
+                )
+            if added:
+                click.echo(f'Added {model.__tablename__} columns: {", ".join(added)}')
+        click.echo('Schema is up to date')
+
+    @app.cli.command('reconcile-scores')
+    def reconcile_scores_command():
+        """Backfill or repair the denormalized vote scores."""
+        for model in (Question, Answer):
+            added = ensure_columns(model)
+            if added:
+                click.echo(f'Added {model.__tablename__} columns: {", ".join(added)}')
+
+        fixed = reconcile_vote_scores()
+        click.echo(f'Reconciled scores: {fixed["question"]} questions, {fixed["answer"]} answers')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Rebuild the full-text question search index."""
+        if db.engine.dialect.name != 'sqlite':
+            click.echo('Full-text search index requires SQLite; search uses LIKE on this database')
+            return
+
+        count = rebuild_search_index()
+        click.echo(f'Indexed {count} questions')
+
+    @app.cli.command('reconcile-tag-counts')
+    def reconcile_tag_counts_command():
+        """Backfill or repair the per-tag active question counts."""
+        ensure_columns(Tag)
+        count = reconcile_tag_counts()
+        click.echo(f'Recounted questions for {count} tags')
+
+    @app.cli.command('reconcile-unread-counts')
+    def reconcile_unread_counts_command():
+        """Backfill or repair the per-user unread notification counters."""
+        ensure_columns(User)
+        count = reconcile_unread_counts()
+        click.echo(f'Recounted unread notifications for {count} users')
+
+    @app.cli.command('dedupe-votes')
+    def dedupe_votes_command():
+        """Drop duplicate votes, add the unique vote indexes and fix scores."""
+        removed = dedupe_votes()
+        click.echo(f'Removed duplicate votes: {removed["question_id"]} on questions, '
+                   f'{removed["answer_id"]} on answers')
+        ensure_columns(Vote)
+        fixed = reconcile_vote_scores()
+        click.echo(f'Reconciled scores: {fixed["question"]} questions, {fixed["answer"]} answers')
+
+    @app.cli.command('rebuild-rankings')
+    def rebuild_rankings_command():
+        """Backfill or recompute the hot and trending ranks."""
+        ensure_columns(Question)
+        count = ranking.rebuild()
+        click.echo(f'Ranked {count} questions')
@@ -0,0 +1,71 @@
+"""
+Conditional GET support (ETag / Last-Modified)
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import request, make_response
+
+from models import db, Answer, question_tags
+
+
+def question_version(question):
+    """Strong ETag and Last-Modified for a question detail response.
+
+    Built from small columns only (no answer bodies) so a poll can be answered
+    with 304 before the full to_dict(include_answers=True) runs. View counts
+    are left out: they change on every flush and the cached body lags them.
+    """
+    answers = db.session.query(
+        Answer.id, Answer.updated_at, Answer.voted_at, Answer.score, Answer.is_accepted, Answer.is_active
+    ).filter(Answer.question_id == question.id).order_by(Answer.id).all()
+
+    tag_ids = sorted(
+        tag_id for (tag_id,) in db.session.query(question_tags.c.tag_id)
+        .filter(question_tags.c.question_id == question.id)
+    )
+
+    fingerprint = repr((
+        question.id, question.updated_at, question.score, question.is_active,
+        [tuple(answer) for answer in answers], tag_ids
+    ))
+    etag = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+    # Votes change scores without touching updated_at; voted_at covers them
+    last_modified = max(
+        timestamp for timestamp in
+        [question.updated_at, question.voted_at]
+        + [answer.updated_at for answer in answers] + [answer.voted_at for answer in answers]
+        if timestamp is not None
+    )
+    return etag, last_modified
+
+
+def is_not_modified(etag, last_modified=None):
+    """Check the request's validators against the current version"""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def conditional(f):
+    """Tag successful GET responses with a content ETag and answer 304s"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if request.method == 'GET' and response.status_code == 200:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return decorated_function
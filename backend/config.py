@@ -9,10 +9,29 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///stackit.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool (None keeps SQLAlchemy's default)
+    DB_POOL_SIZE = int(os.environ['DB_POOL_SIZE']) if os.environ.get('DB_POOL_SIZE') else None
+    DB_MAX_OVERFLOW = None
+    DB_POOL_TIMEOUT = None  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ['DB_POOL_RECYCLE']) if os.environ.get('DB_POOL_RECYCLE') else None  # seconds
+    
+    # Pragmas run on every new SQLite connection
+    SQLITE_PRAGMAS = {}
+    
     # JWT configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    REVOCATION_REFRESH_INTERVAL = 5  # seconds between revocation list syncs
+    REVOCATION_SYNC_OVERLAP = 60  # seconds re-read each sync; longer than any commit delay or clock skew
+    
+    # Password hashing: bcrypt work factor and hashing process pool size (0 = inline)
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', os.cpu_count() or 1))
+    
+    # Per-process cache of the caller's id, username, role and status
+    IDENTITY_CACHE_SIZE = 10000
+    IDENTITY_CACHE_TTL = 30  # seconds
     
     # CORS configuration
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173']
@@ -22,18 +41,80 @@ class Config:
     ANSWERS_PER_PAGE = 10
     NOTIFICATIONS_PER_PAGE = 50
     
+    # View counter (write-behind)
+    VIEW_COUNTER_FLUSH_INTERVAL = 5  # seconds between batched flushes
+    VIEW_COUNTER_MAX_PENDING = 1000  # buffered views that force a flush
+    
+    # Response cache for public read endpoints ('lru' or 'null')
+    RESPONSE_CACHE_BACKEND = 'lru'
+    RESPONSE_CACHE_OPTIONS = {'max_entries': 1024, 'ttl': 60}
+    
+    # Tag autocomplete index reload interval (seconds)
+    TAG_INDEX_REFRESH_INTERVAL = 60
+    
+    # Notifications are bulk-inserted by a background worker
+    NOTIFICATIONS_ASYNC = True
+    NOTIFICATION_BATCH_SIZE = 500
+    NOTIFICATION_FLUSH_INTERVAL = 1.0  # seconds to wait for a batch to fill
+    NOTIFICATION_MAX_RETRIES = 5
+    
+    # Hot/trending ranking: activity weights, hot decay (seconds per 10x
+    # activity), trending gravity and window, and re-decay job interval
+    RANKING_WEIGHTS = {'votes': 1.0, 'answers': 2.0, 'views': 0.05}
+    HOT_DECAY_SECONDS = 45000
+    TRENDING_GRAVITY = 1.8
+    TRENDING_WINDOW_DAYS = 7
+    RANKING_REDECAY_INTERVAL = 300  # seconds, 0 disables the job
+    
+    # Largest /api/batch request (votes and notification reads)
+    BATCH_MAX_OPERATIONS = 500
+    
+    # Per-request SQL counts/timing headers and the slow query log
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', '').lower() in ('1', 'true')
+    SLOW_QUERY_MS = 100  # statements at least this slow are logged with their plan
+    SLOW_QUERY_EXPLAIN = True
+    SLOW_QUERY_LOG_SIZE = 100  # recent slow queries kept for /api/admin/slow-queries
+    
+    # Prometheus metrics at /api/metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true')
+    METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+    # Shared directory for snapshots when several worker processes serve the app;
+    # unset for a single process
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = 5  # seconds between a process's snapshots
+    
     # File upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() in ('1', 'true')
     
 class ProductionConfig(Config):
     DEBUG = False
     
+    # Readers don't block on writers in WAL mode; the database must be on a
+    # local disk, next to its -wal and -shm files
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+        'busy_timeout': 5000,  # ms a writer waits for the lock before "database is locked"
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative means KiB: 64 MiB per connection
+    }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = 10
+    DB_POOL_TIMEOUT = 10
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))
+    
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test_stackit.db'
+    VIEW_COUNTER_MAX_PENDING = 1  # write views through
+    NOTIFICATIONS_ASYNC = False
+    BCRYPT_ROUNDS = 4
+    BCRYPT_WORKERS = 0
+    RANKING_REDECAY_INTERVAL = 0
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Export script for StackIt
+Streams questions, answers and votes as NDJSON, optionally gzipped and
+limited to rows updated since a timestamp (for nightly incremental dumps).
+Incremental dumps also list votes removed since then as "vote_deleted" lines.
+
+Usage: python export_data.py -o dump.ndjson.gz --gzip --since 2024-01-01T00:00:00
+"""
+
+import argparse
+import gzip
+import sys
+
+from app import create_app
+from export import iter_export, parse_since, parse_tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--gzip', action='store_true', help='gzip the output')
+    parser.add_argument('--since', help='only rows updated (and votes removed) at or after this ISO timestamp')
+    parser.add_argument('--tables', help='comma-separated subset of questions,answers,votes')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='rows fetched per round trip')
+    args = parser.parse_args()
+
+    try:
+        tables = parse_tables(args.tables)
+        since = parse_since(args.since)
+    except ValueError as e:
+        parser.error(str(e))
+
+    app = create_app()
+    with app.app_context():
+        if args.output:
+            out = gzip.open(args.output, 'wt', encoding='utf-8') if args.gzip \
+                else open(args.output, 'w', encoding='utf-8')
+        elif args.gzip:
+            out = gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8')
+        else:
+            out = sys.stdout
+
+        count = 0
+        try:
+            for line in iter_export(tables, since, chunk_size=args.chunk_size):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    print(f"Exported {count} rows", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Synthetic corpus generator for StackIt
+Recreates the database and fills it with users, tags, questions, answers,
+votes and notifications at any scale. The data is skewed the way real
+traffic is:
+
+  - tag popularity is Zipfian, so a few tags cover most questions
+  - a few hot questions draw most of the answers, votes and views
+  - a few heavy voters cast most of the votes
+
+Rows are streamed into executemany inserts inside one transaction per table,
+and the denormalized counters (scores, tag counts, unread counts, ranks,
+search index) are written once at the end. The same seed gives the same
+corpus.
+
+Usage: python generate_data.py --questions 100000 --answers 300000 --votes 10000000 --seed 42
+"""
+
+import argparse
+import itertools
+import json
+import random
+import time
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import JSON, DateTime, bindparam
+
+from app import create_app
+from models import db, User, Question, Answer, Vote, Tag, Notification, question_tags
+from search import rebuild_search_index
+from ranking import ranking
+from tag_index import clear_tag_ids
+
+WORDS = (
+    'how', 'why', 'best', 'way', 'to', 'handle', 'async', 'state', 'query', 'slow',
+    'error', 'when', 'using', 'with', 'without', 'deploy', 'cache', 'test', 'build',
+    'config', 'auth', 'token', 'request', 'response', 'database', 'index', 'memory',
+    'thread', 'process', 'api', 'route', 'model', 'schema', 'migration', 'component',
+    'render', 'hook', 'event', 'stream', 'file', 'upload', 'parse', 'json', 'form',
+)
+
+TAG_NAMES = (
+    'python', 'javascript', 'react', 'flask', 'sql', 'sqlalchemy', 'css', 'html',
+    'node.js', 'typescript', 'docker', 'git', 'linux', 'postgresql', 'sqlite',
+    'authentication', 'jwt', 'api', 'performance', 'testing', 'webpack', 'redux',
+)
+
+NOTIFICATION_TYPES = ('answer', 'comment', 'mention', 'accept')
+
+
+class ZipfSampler:
+    """Draws ids 1..n with Zipfian popularity, the most popular ids spread at random"""
+
+    def __init__(self, rng, n, s=1.1):
+        self.rng = rng
+        self.ids = array('l', range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.rank = array('l', [0]) * (n + 1)
+        for rank, item in enumerate(self.ids):
+            self.rank[item] = rank
+        self.cum_weights = array('d', itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+        self.total = self.cum_weights[-1] if n else 0
+
+    def sample(self, k):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def share(self, item):
+        """Fraction of all draws that land on item"""
+        rank = self.rank[item]
+        weight = self.cum_weights[rank] - (self.cum_weights[rank - 1] if rank else 0)
+        return weight / self.total
+
+    def distinct(self, k):
+        """k different ids; tops up uniformly once the long tail stops yielding new ones"""
+        k = min(k, len(self.ids))
+        chosen = set()
+        for _ in range(4):
+            if len(chosen) >= k:
+                break
+            chosen.update(self.sample(k - len(chosen)))
+        while len(chosen) < k:
+            chosen.add(self.rng.choice(self.ids))
+        return chosen
+
+
+def vote_budgets(voters, total, cap):
+    """Split `total` votes over users by Zipfian share, none above `cap`.
+
+    Whatever the capped heavy voters can't cast is shared out again among the
+    rest, so the total is met unless every user is at the cap.
+    """
+    budgets = {}
+    remaining = list(voters.ids)
+    while remaining and total > 0:
+        weight = sum(voters.share(user_id) for user_id in remaining)
+        uncapped = []
+        for user_id in remaining:
+            budget = int(round(total * voters.share(user_id) / weight))
+            if budget >= cap:
+                budgets[user_id] = cap
+            else:
+                budgets[user_id] = budget
+                uncapped.append(user_id)
+        if len(uncapped) == len(remaining):
+            break
+        total -= cap * (len(remaining) - len(uncapped))
+        remaining = uncapped
+    return budgets
+
+
+def insert_rows(conn, table, rows, batch_size):
+    """executemany `rows` (any iterable of dicts) in batches; returns the count.
+
+    On SQLite the rows go to the driver as tuples in SQLAlchemy's storage
+    format, skipping the per-value type processing that otherwise costs more
+    than the insert itself.
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return 0
+    rows = itertools.chain([first], rows)
+    columns = list(first)
+
+    if conn.dialect.name == 'sqlite':
+        converters = [_storage_converter(table.c[column].type) for column in columns]
+        preparer = conn.dialect.identifier_preparer
+        statement = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            preparer.format_table(table),
+            ', '.join(preparer.quote(column) for column in columns),
+            ', '.join('?' * len(columns))
+        )
+
+        def execute(batch):
+            conn.exec_driver_sql(statement, [
+                tuple(value if convert is None or value is None else convert(value)
+                      for convert, value in zip(converters, row.values()))
+                for row in batch
+            ])
+    else:
+        def execute(batch):
+            conn.execute(table.insert(), batch)
+
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            execute(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        execute(batch)
+        count += len(batch)
+    return count
+
+
+def _storage_converter(column_type):
+    # The formats SQLAlchemy's SQLite types write, so the ORM reads rows back as usual
+    if isinstance(column_type, DateTime):
+        return lambda value: value.isoformat(' ', 'microseconds')
+    if isinstance(column_type, JSON):
+        return json.dumps
+    return None
+
+
+def words(rng, count):
+    return ' '.join(rng.choices(WORDS, k=count))
+
+
+def generate(users=1000, tags=200, questions=10000, answers=30000, votes=100000,
+             notifications=20000, seed=42, days=365, batch_size=10000, log=print):
+    """Recreate the database and fill it; returns row counts per table"""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    start = now - timedelta(days=days)
+    span = (now - start).total_seconds()
+    counts = {}
+
+    def timer(name, started):
+        log(f'  {name}: {counts[name]} rows in {time.perf_counter() - started:.1f}s')
+
+    db.drop_all()
+    db.create_all()
+    clear_tag_ids()
+
+    # One hash for everyone: bcrypt per user would dominate the load time
+    probe = User()
+    probe.set_password('password123')
+    password_hash = probe.password_hash
+
+    with db.engine.connect() as conn:
+        if db.engine.dialect.name == 'sqlite':
+            # Throwaway database; a crash mid-load just means running it again
+            conn.exec_driver_sql('PRAGMA synchronous=OFF')
+            conn.commit()
+
+        user_ids = range(1, users + 1)
+        user_created = [start + timedelta(seconds=rng.random() * span / 2) for _ in user_ids]
+
+        started = time.perf_counter()
+        with conn.begin():
+            counts['user'] = insert_rows(conn, User.__table__, ({
+                'id': user_id,
+                'username': f'user{user_id}',
+                'email': f'user{user_id}@example.com',
+                'password_hash': password_hash,
+                # user1 is an admin so benchmarks can hit the admin routes
+                'role': 'admin' if user_id == 1 else 'user',
+                'avatar': '👤',
+                'created_at': user_created[user_id - 1],
+                'is_active': True,
+                'unread_notifications': 0,
+                'token_version': 0,
+            } for user_id in user_ids), batch_size)
+        timer('user', started)
+
+        tag_names = list(TAG_NAMES[:tags]) + [
+            f'{rng.choice(TAG_NAMES)}-{i}' for i in range(len(TAG_NAMES), tags)
+        ]
+        started = time.perf_counter()
+        with conn.begin():
+            counts['tag'] = insert_rows(conn, Tag.__table__, ({
+                'id': tag_id, 'name': name, 'created_at': start, 'question_count': 0
+            } for tag_id, name in enumerate(tag_names, 1)), batch_size)
+        timer('tag', started)
+
+        authors = ZipfSampler(rng, users, s=0.8)
+        tag_sampler = ZipfSampler(rng, tags, s=1.1)
+        hot_questions = ZipfSampler(rng, questions, s=1.1)
+        question_created = sorted(
+            start + timedelta(seconds=rng.random() * span) for _ in range(questions)
+        )
+        tag_counts = [0] * (tags + 1)
+        question_tag_rows = []
+
+        def question_rows():
+            question_authors = authors.sample(questions)
+            for question_id in range(1, questions + 1):
+                created_at = question_created[question_id - 1]
+                chosen = tag_sampler.distinct(rng.randint(1, min(5, tags))) if tags else ()
+                for tag_id in chosen:
+                    tag_counts[tag_id] += 1
+                    question_tag_rows.append({'question_id': question_id, 'tag_id': tag_id})
+                title_tags = ' '.join(tag_names[tag_id - 1] for tag_id in chosen)
+                yield {
+                    'id': question_id,
+                    'title': f'{words(rng, rng.randint(4, 9))} {title_tags}'.strip()[:200],
+                    'description': f'<p>{words(rng, rng.randint(20, 80))}</p>'
+                                   f'<pre><code>{words(rng, rng.randint(5, 20))}</code></pre>',
+                    'author_id': question_authors[question_id - 1],
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'views': int(questions * 50 * hot_questions.share(question_id)) + rng.randint(0, 20),
+                    'score': 0,
+                    'hot_score': 0,
+                    'trending_score': 0,
+                    'is_active': True,
+                }
+                if len(question_tag_rows) >= batch_size:
+                    conn.execute(question_tags.insert(), question_tag_rows)
+                    question_tag_rows.clear()
+
+        started = time.perf_counter()
+        with conn.begin():
+            counts['question'] = insert_rows(conn, Question.__table__, question_rows(), batch_size)
+            if question_tag_rows:
+                conn.execute(question_tags.insert(), question_tag_rows)
+            conn.execute(
+                Tag.__table__.update().where(Tag.__table__.c.id == bindparam('tag_id'))
+                .values(question_count=bindparam('count')),
+                [{'tag_id': tag_id, 'count': count} for tag_id, count in enumerate(tag_counts) if count]
+            )
+        timer('question', started)
+
+        answered = set()
+        answer_question = [0] * (answers + 1)
+
+        def answer_rows():
+            targets = hot_questions.sample(answers) if questions else []
+            answer_authors = authors.sample(answers)
+            for answer_id in range(1, answers + 1):
+                question_id = targets[answer_id - 1]
+                answer_question[answer_id] = question_id
+                asked = question_created[question_id - 1]
+                created_at = min(asked + timedelta(hours=rng.expovariate(1 / 24)), now)
+                # The first answer to a question is accepted some of the time
+                accepted = question_id not in answered and rng.random() < 0.4
+                answered.add(question_id)
+                yield {
+                    'id': answer_id,
+                    'content': f'<p>{words(rng, rng.randint(15, 60))}</p>',
+                    'author_id': answer_authors[answer_id - 1],
+                    'question_id': question_id,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'is_accepted': accepted,
+                    'is_active': True,
+                    'score': 0,
+                }
+
+        started = time.perf_counter()
+        with conn.begin():
+            counts['answer'] = insert_rows(
+                conn, Answer.__table__, answer_rows() if questions else (), batch_size
+            )
+        timer('answer', started)
+
+        question_scores = [0] * (questions + 1)
+        answer_scores = [0] * (answers + 1)
+        hot_answers = ZipfSampler(rng, answers, s=1.1)
+        voters = ZipfSampler(rng, users, s=1.2)
+
+        # Per-kind cap so a heavy voter can't vote on more than a tenth of the posts
+        question_cap = max(questions // 10, 1) if questions else 0
+        answer_cap = max(answers // 10, 1) if answers else 0
+        budgets = vote_budgets(voters, votes, question_cap + answer_cap)
+
+        def vote_rows():
+            for user_id in user_ids:
+                budget = budgets.get(user_id, 0)
+                on_answers = min(int(budget * 0.4), answer_cap)
+                on_questions = min(budget - on_answers, question_cap)
+                on_answers = min(budget - on_questions, answer_cap)
+                picks = [
+                    ('question_id', question_scores, hot_questions, on_questions),
+                    ('answer_id', answer_scores, hot_answers, on_answers),
+                ]
+                for column, scores, sampler, wanted in picks:
+                    if wanted <= 0:
+                        continue
+                    for target_id in sampler.distinct(wanted):
+                        value = 1 if rng.random() < 0.85 else -1
+                        scores[target_id] += value
+                        cast_at = start + timedelta(seconds=rng.random() * span)
+                        yield {
+                            'user_id': user_id,
+                            'question_id': target_id if column == 'question_id' else None,
+                            'answer_id': target_id if column == 'answer_id' else None,
+                            'value': value,
+                            'created_at': cast_at,
+                            'updated_at': cast_at,
+                        }
+
+        started = time.perf_counter()
+        with conn.begin():
+            # Building the indexes once after the load beats updating them per row
+            for index in Vote.__table__.indexes:
+                index.drop(conn)
+            counts['vote'] = insert_rows(conn, Vote.__table__, vote_rows(), batch_size)
+            for index in Vote.__table__.indexes:
+                index.create(conn)
+            for model, scores in ((Question, question_scores), (Answer, answer_scores)):
+                table = model.__table__
+                params = [
+                    {'target_id': target_id, 'new_score': score}
+                    for target_id, score in enumerate(scores) if score
+                ]
+                if params:
+                    conn.execute(
+                        table.update().where(table.c.id == bindparam('target_id'))
+                        .values(score=bindparam('new_score')),
+                        params
+                    )
+        timer('vote', started)
+
+        recipients = ZipfSampler(rng, users, s=1.0)
+        unread = [0] * (users + 1)
+
+        def notification_rows():
+            for user_id in recipients.sample(notifications):
+                is_read = rng.random() < 0.7
+                if not is_read:
+                    unread[user_id] += 1
+                kind = rng.choice(NOTIFICATION_TYPES)
+                yield {
+                    'user_id': user_id,
+                    'type': kind,
+                    'message': f'New {kind}: {words(rng, 6)}',
+                    'data': {'question_id': rng.randint(1, questions)} if questions else {},
+                    'is_read': is_read,
+                    'created_at': start + timedelta(seconds=rng.random() * span),
+                }
+
+        started = time.perf_counter()
+        with conn.begin():
+            counts['notification'] = insert_rows(
+                conn, Notification.__table__, notification_rows() if users else (), batch_size
+            )
+            table = User.__table__
+            params = [{'user_id': user_id, 'count': count} for user_id, count in enumerate(unread) if count]
+            if params:
+                conn.execute(
+                    table.update().where(table.c.id == bindparam('user_id'))
+                    .values(unread_notifications=bindparam('count')),
+                    params
+                )
+        timer('notification', started)
+
+    started = time.perf_counter()
+    if db.engine.dialect.name == 'sqlite':
+        rebuild_search_index()
+    ranking.rebuild()
+    log(f'  search index and rankings in {time.perf_counter() - started:.1f}s')
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tags', type=int, default=200)
+    parser.add_argument('--questions', type=int, default=10000)
+    parser.add_argument('--answers', type=int, default=30000)
+    parser.add_argument('--votes', type=int, default=100000)
+    parser.add_argument('--notifications', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=365, help='spread of creation times')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per executemany')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f"Generating corpus in {db.engine.url}...")
+        started = time.perf_counter()
+        counts = generate(
+            users=args.users, tags=args.tags, questions=args.questions, answers=args.answers,
+            votes=args.votes, notifications=args.notifications, seed=args.seed,
+            days=args.days, batch_size=args.batch_size
+        )
+        print(f"Done in {time.perf_counter() - started:.1f}s: " +
+              ', '.join(f'{count} {name}s' for name, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Password hashing
+bcrypt with a configurable work factor, run on a dedicated process pool so
+hashing bursts don't tie up request threads or the GIL.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def get_rounds(hashed):
+    """Work factor of a bcrypt hash ($2b$<rounds>$...), or None if unparseable"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt front end; workers = 0 hashes inline on the calling thread"""
+
+    def __init__(self, app=None, rounds=12, workers=0):
+        self.rounds = rounds
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_ROUNDS', self.rounds)
+        self.workers = app.config.get('BCRYPT_WORKERS', self.workers)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(_hashpw, password, self.rounds)
+
+    def check(self, password, hashed):
+        return self._run(_checkpw, password, hashed)
+
+    def needs_rehash(self, hashed):
+        """True when a hash was made with a different work factor than configured"""
+        return get_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and answer inline now
+            with self._lock:
+                self._executor = None
+            return fn(*args)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,124 @@
+"""
+Per-request SQL instrumentation
+Counts the statements each request runs and the time spent in the database,
+and reports them as X-Query-Count and Server-Timing response headers.
+Statements slower than SLOW_QUERY_MS are logged to the 'stackit.slow_queries'
+logger with their query plan.
+
+Off unless SQL_INSTRUMENTATION is set; when off no engine events or request
+hooks are registered at all.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+from models import db
+
+
+class QueryInstrumentation:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.slow_query_ms = 100
+        self.explain = True
+        self.slow_queries = deque(maxlen=100)
+        self.logger = logging.getLogger('stackit.slow_queries')
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_INSTRUMENTATION', False)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', self.slow_query_ms)
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', self.explain)
+        self.slow_queries = deque(maxlen=app.config.get('SLOW_QUERY_LOG_SIZE', 100))
+        app.extensions['query_instrumentation'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def get_status(self):
+        return {
+            'enabled': self.enabled,
+            'slow_query_ms': self.slow_query_ms,
+            'explain': self.explain,
+            'slow_queries': list(self.slow_queries)
+        }
+
+    def _start_request(self):
+        g.query_stats = {'count': 0, 'seconds': 0.0, 'started': time.perf_counter()}
+
+    def _finish_request(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats['started']) * 1000
+        response.headers['X-Query-Count'] = str(stats['count'])
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats["seconds"] * 1000:.2f};desc="{stats["count"]} queries", '
+            f'total;dur={total_ms:.2f}'
+        )
+        return response
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context, so a failed statement leaves nothing behind
+        context._query_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+
+        # Background writers run in an app context but outside a request
+        stats = g.get('query_stats') if has_app_context() else None
+        if stats is not None:
+            stats['count'] += 1
+            stats['seconds'] += elapsed
+
+        if elapsed * 1000 >= self.slow_query_ms:
+            self._log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+    def _log_slow_query(self, conn, statement, parameters, executemany, elapsed):
+        plan = None
+        if self.explain and not executemany:
+            plan = self._explain(conn, statement, parameters)
+
+        entry = {
+            'at': datetime.utcnow().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'endpoint': request.endpoint if has_request_context() else threading.current_thread().name,
+            'statement': statement,
+            'plan': plan
+        }
+        self.slow_queries.append(entry)
+        self.logger.warning(
+            'Slow query (%.1f ms) in %s: %s%s', entry['duration_ms'], entry['endpoint'],
+            ' '.join(statement.split()), ''.join(f'\n  {line}' for line in plan or ())
+        )
+
+    def _explain(self, conn, statement, parameters):
+        # A raw DBAPI cursor, so the plan query neither re-enters SQLAlchemy
+        # nor fires these events
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            return None
+        finally:
+            cursor.close()
+        # SQLite rows are (id, parent, notused, detail); other databases return one text column
+        return [row[-1] for row in rows]
+
+
+query_instrumentation = QueryInstrumentation()
@@ -0,0 +1,332 @@
+"""
+Prometheus metrics
+Per-endpoint request counts by status, latency histograms, in-flight
+requests, database pool usage and cache hit ratios, served as Prometheus
+text from /api/metrics.
+
+Each request thread counts into its own shard, so recording takes no lock;
+a scrape sums the shards. With METRICS_DIR set, every process also writes a
+snapshot there and the scrape merges the snapshots of all processes, so it
+doesn't matter which worker answers.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from flask import g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fold shards of finished threads into the totals once this many exist
+MAX_SHARDS = 64
+
+
+class _Shard:
+    """One thread's counters; only that thread writes to it"""
+
+    def __init__(self, bucket_count):
+        self.thread = threading.current_thread()
+        self.bucket_count = bucket_count
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.latency = {}  # (endpoint, method) -> [per-bucket counts..., +Inf count, sum]
+        self.in_flight = 0
+
+
+class Metrics:
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.buckets = DEFAULT_BUCKETS
+        self.directory = None
+        self.flush_interval = 5.0
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {'requests': {}, 'latency': {}}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.buckets = tuple(app.config.get('METRICS_LATENCY_BUCKETS', self.buckets))
+        self.directory = app.config.get('METRICS_DIR', self.directory)
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            atexit.register(self.write_snapshot)
+
+    # Recording
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None or shard.bucket_count != len(self.buckets):
+            shard = self._local.shard = _Shard(len(self.buckets))
+            with self._lock:
+                self._shards.append(shard)
+                if len(self._shards) > MAX_SHARDS:
+                    self._retire_finished()
+        return shard
+
+    def _start_request(self):
+        self._shard().in_flight += 1
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        self._record(response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        if 'metrics_recorded' not in g:
+            # An unhandled exception skipped after_request
+            self._record(500)
+        self._shard().in_flight -= 1
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.write_snapshot()
+
+    def _record(self, status):
+        started = g.get('metrics_started')
+        if started is None or 'metrics_recorded' in g:
+            return
+        g.metrics_recorded = True
+        elapsed = time.perf_counter() - started
+
+        shard = self._shard()
+        endpoint = request.endpoint or 'unmatched'
+        key = (endpoint, request.method, str(status))
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+
+        key = (endpoint, request.method)
+        histogram = shard.latency.get(key)
+        if histogram is None:
+            histogram = shard.latency[key] = [0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if elapsed <= bound:
+                histogram[index] += 1
+                break
+        else:
+            histogram[len(self.buckets)] += 1
+        histogram[-1] += elapsed
+
+    def _retire_finished(self):
+        # Called with the lock held; finished threads never write again
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                _merge_counts(self._retired['requests'], shard.requests)
+                _merge_histograms(self._retired['latency'], shard.latency)
+        self._shards = live
+
+    # Reading
+
+    def snapshot(self):
+        """This process's totals as plain data (JSON-serializable)"""
+        requests, latency = {}, {}
+        with self._lock:
+            self._retire_finished()
+            _merge_counts(requests, self._retired['requests'])
+            _merge_histograms(latency, self._retired['latency'])
+            shards = list(self._shards)
+        in_flight = 0
+        for shard in shards:
+            _merge_counts(requests, shard.requests.copy())
+            _merge_histograms(latency, shard.latency.copy())
+            in_flight += shard.in_flight
+
+        return {
+            'pid': os.getpid(),
+            'buckets': list(self.buckets),
+            'requests': [[*key, count] for key, count in requests.items()],
+            'latency': [[*key, histogram] for key, histogram in latency.items()],
+            'in_flight': in_flight,
+            'pool': _pool_stats(),
+            'caches': _cache_stats(),
+        }
+
+    def write_snapshot(self):
+        """Publish this process's snapshot for the other workers' scrapes"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temporary, path)
+
+    def collect(self):
+        """Snapshots of every process: this one live, the others from METRICS_DIR"""
+        own = self.snapshot()
+        snapshots = [own]
+        if not self.directory:
+            return snapshots
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == f'{own["pid"]}.json':
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get('buckets') != own['buckets']:
+                continue
+            if not _process_alive(snapshot['pid']):
+                # Counters of exited workers still count; their gauges don't
+                snapshot.update(in_flight=0, pool={}, caches={})
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        """Prometheus text exposition of all processes' metrics"""
+        snapshots = self.collect()
+        requests, latency = {}, {}
+        pool, caches = {}, {}
+        in_flight = 0
+        for snapshot in snapshots:
+            _merge_counts(requests, {tuple(row[:-1]): row[-1] for row in snapshot['requests']})
+            _merge_histograms(latency, {tuple(row[:-1]): row[-1] for row in snapshot['latency']})
+            _merge_counts(pool, snapshot['pool'])
+            for name, stats in snapshot['caches'].items():
+                _merge_counts(caches.setdefault(name, {}), stats)
+            in_flight += snapshot['in_flight']
+
+        lines = [
+            '# HELP stackit_http_requests_total Requests handled, by endpoint, method and status.',
+            '# TYPE stackit_http_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'stackit_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            '# HELP stackit_http_request_duration_seconds Request latency, by endpoint and method.',
+            '# TYPE stackit_http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), histogram in sorted(latency.items()):
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                lines.append(f'stackit_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram[len(self.buckets)]
+            lines += [
+                f'stackit_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}',
+                f'stackit_http_request_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}',
+                f'stackit_http_request_duration_seconds_count{{{labels}}} {cumulative}',
+            ]
+
+        lines += [
+            '# HELP stackit_http_requests_in_flight Requests being handled right now.',
+            '# TYPE stackit_http_requests_in_flight gauge',
+            f'stackit_http_requests_in_flight {in_flight}',
+            '# HELP stackit_processes Worker processes that have reported metrics.',
+            '# TYPE stackit_processes gauge',
+            f'stackit_processes {len(snapshots)}',
+        ]
+
+        for name, help_text in (
+            ('size', 'Connections the pool keeps open.'),
+            ('checked_out', 'Connections in use.'),
+            ('checked_in', 'Idle connections in the pool.'),
+            ('overflow', 'Connections open beyond the pool size.'),
+        ):
+            if name in pool:
+                lines += [
+                    f'# HELP stackit_db_pool_{name} {help_text}',
+                    f'# TYPE stackit_db_pool_{name} gauge',
+                    f'stackit_db_pool_{name} {pool[name]}',
+                ]
+
+        lines += [
+            '# HELP stackit_cache_requests_total Cache lookups, by cache and result.',
+            '# TYPE stackit_cache_requests_total counter',
+        ]
+        for name, stats in sorted(caches.items()):
+            for result, key in (('hit', 'hits'), ('miss', 'misses')):
+                lines.append(f'stackit_cache_requests_total{{cache="{name}",result="{result}"}} {stats.get(key, 0)}')
+        lines += [
+            '# HELP stackit_cache_hit_ratio Share of cache lookups that hit.',
+            '# TYPE stackit_cache_hit_ratio gauge',
+        ]
+        for name, stats in sorted(caches.items()):
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            if lookups:
+                lines.append(f'stackit_cache_hit_ratio{{cache="{name}"}} {stats["hits"] / lookups:.4f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_counts(target, source):
+    for key, count in source.items():
+        target[key] = target.get(key, 0) + count
+
+
+def _merge_histograms(target, source):
+    for key, histogram in source.items():
+        merged = target.get(key)
+        if merged is None:
+            target[key] = list(histogram)
+        else:
+            for index, value in enumerate(histogram):
+                merged[index] += value
+
+
+def _pool_stats():
+    from models import db
+    try:
+        pool = db.engine.pool
+    except RuntimeError:
+        return {}
+    stats = {}
+    for name in ('size', 'checkedout', 'checkedin', 'overflow'):
+        method = getattr(pool, name, None)
+        if method is not None:
+            stats[name.replace('checked', 'checked_')] = method()
+    if 'overflow' in stats:
+        # QueuePool counts unused pool slots as negative overflow
+        stats['overflow'] = max(stats['overflow'], 0)
+    return stats
+
+
+def _cache_stats():
+    from auth import identity_cache, sanitize_cache
+    from cache import response_cache
+    caches = {
+        'response': response_cache.backend.get_stats(),
+        'identity': identity_cache.get_stats(),
+        'sanitize': sanitize_cache.get_stats(),
+    }
+    return {
+        name: {'hits': stats.get('hits', 0), 'misses': stats.get('misses', 0)}
+        for name, stats in caches.items() if stats
+    }
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+metrics = Metrics()
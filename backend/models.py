@@ -1,6 +1,9 @@
+from collections import defaultdict
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-import bcrypt
+from sqlalchemy import func
+from hashing import password_hasher
+from pagination import keyset_paginate
 
 db = SQLAlchemy()
 
@@ -19,6 +22,8 @@ class User(db.Model):
     avatar = db.Column(db.String(200), default='👤')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     questions = db.relationship('Question', backref='author', lazy='dynamic', cascade='all, delete-orphan')
@@ -28,11 +33,15 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set the password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.check(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash uses a different work factor than configured"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -45,14 +54,27 @@ class User(db.Model):
             'is_active': self.is_active
         }
 
+def load_users(user_ids):
+    """Load users by id in a single query, returned as {id: user}"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False, index=True)
     description = db.Column(db.Text, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    views = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    views = db.Column(db.Integer, default=0, index=True)
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    # When a vote on it was last cast, changed or removed (votes leave updated_at alone)
+    voted_at = db.Column(db.DateTime, nullable=True)
+    # Precomputed ranks for sort=hot and sort=trending (see ranking.py)
+    hot_score = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)
+    trending_score = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)
     is_active = db.Column(db.Boolean, default=True)
     
     # Relationships
@@ -62,32 +84,79 @@ class Question(db.Model):
                           backref=db.backref('questions', lazy=True))
     
     def get_vote_score(self):
-        """Calculate total vote score"""
-        return sum(vote.value for vote in self.votes)
+        """Get total vote score (maintained by the vote endpoints)"""
+        return self.score or 0
     
     def get_accepted_answer(self):
         """Get the accepted answer if any"""
         return self.answers.filter_by(is_accepted=True).first()
     
-    def to_dict(self, include_answers=False):
-        data = {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'author': self.author.to_dict(),
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'views': self.views,
-            'votes': self.get_vote_score(),
-            'answers_count': self.answers.count(),
-            'tags': [tag.name for tag in self.tags],
-            'is_active': self.is_active
-        }
+    def to_dict(self, include_answers=False, answers_per_page=10):
+        return Question.serialize_many(
+            [self], include_answers=include_answers, answers_per_page=answers_per_page
+        )[0]
+    
+    @staticmethod
+    def serialize_many(questions, include_answers=False, answers_per_page=10):
+        """Serialize a page of questions with a fixed number of grouped queries.
+        
+        With include_answers, each question carries its first page of answers
+        (see page_answers) and the cursor for the next one.
+        """
+        if not questions:
+            return []
         
+        question_ids = [question.id for question in questions]
+        
+        answer_counts = dict(
+            db.session.query(Answer.question_id, func.count(Answer.id))
+            .filter(Answer.question_id.in_(question_ids))
+            .group_by(Answer.question_id)
+        )
+        
+        tag_names = defaultdict(list)
+        tag_rows = db.session.query(question_tags.c.question_id, Tag.name)\
+            .join(Tag, Tag.id == question_tags.c.tag_id)\
+            .filter(question_tags.c.question_id.in_(question_ids))
+        for question_id, name in tag_rows:
+            tag_names[question_id].append(name)
+        
+        answers = {}
+        next_cursors = {}
         if include_answers:
-            data['answers'] = [answer.to_dict() for answer in self.answers.filter_by(is_active=True)]
+            for question_id in question_ids:
+                answers[question_id], next_cursors[question_id] = page_answers(
+                    question_id, per_page=answers_per_page
+                )
+        
+        authors = load_users(
+            [question.author_id for question in questions] +
+            [answer.author_id for page in answers.values() for answer in page]
+        )
+        
+        result = []
+        for question in questions:
+            data = {
+                'id': question.id,
+                'title': question.title,
+                'description': question.description,
+                'author': authors[question.author_id].to_dict(),
+                'created_at': question.created_at.isoformat(),
+                'updated_at': question.updated_at.isoformat(),
+                'views': question.views,
+                'votes': question.get_vote_score(),
+                'answers_count': answer_counts.get(question.id, 0),
+                'tags': tag_names[question.id],
+                'is_active': question.is_active
+            }
             
-        return data
+            if include_answers:
+                data['answers'] = Answer.serialize_many(answers[question.id], authors=authors)
+                data['answers_next_cursor'] = next_cursors[question.id]
+            
+            result.append(data)
+        
+        return result
 
 class Answer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -95,29 +164,56 @@ class Answer(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_accepted = db.Column(db.Boolean, default=False)
     is_active = db.Column(db.Boolean, default=True)
+    score = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+    # When a vote on it was last cast, changed or removed (votes leave updated_at alone)
+    voted_at = db.Column(db.DateTime, nullable=True)
+    
+    # Serves page_answers' ordering without a sort
+    __table_args__ = (
+        db.Index('ix_answer_question_rank', 'question_id', 'is_accepted', 'score', 'id'),
+    )
     
     # Relationships
     votes = db.relationship('Vote', backref='answer', lazy='dynamic', cascade='all, delete-orphan')
     
     def get_vote_score(self):
-        """Calculate total vote score"""
-        return sum(vote.value for vote in self.votes)
+        """Get total vote score (maintained by the vote endpoints)"""
+        return self.score or 0
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'content': self.content,
-            'author': self.author.to_dict(),
-            'question_id': self.question_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'votes': self.get_vote_score(),
-            'is_accepted': self.is_accepted,
-            'is_active': self.is_active
-        }
+        return Answer.serialize_many([self])[0]
+    
+    @staticmethod
+    def serialize_many(answers, authors=None):
+        """Serialize answers, loading their authors in one query"""
+        if authors is None:
+            authors = load_users(answer.author_id for answer in answers)
+        
+        return [{
+            'id': answer.id,
+            'content': answer.content,
+            'author': authors[answer.author_id].to_dict(),
+            'question_id': answer.question_id,
+            'created_at': answer.created_at.isoformat(),
+            'updated_at': answer.updated_at.isoformat(),
+            'votes': answer.get_vote_score(),
+            'is_accepted': answer.is_accepted,
+            'is_active': answer.is_active
+        } for answer in answers]
+
+def page_answers(question_id, cursor=None, per_page=10):
+    """One page of a question's active answers: accepted first, then by score.
+    
+    Returns (answers, next_cursor); raises InvalidCursor for a bad cursor.
+    """
+    query = Answer.query.filter_by(question_id=question_id, is_active=True)
+    return keyset_paginate(
+        query, [Answer.is_accepted, Answer.score, Answer.id], 'answers',
+        cursor=cursor, per_page=per_page
+    )
 
 class Vote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -126,10 +222,14 @@ class Vote(db.Model):
     answer_id = db.Column(db.Integer, db.ForeignKey('answer.id'), nullable=True)
     value = db.Column(db.Integer, nullable=False)  # 1 for upvote, -1 for downvote
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set when a vote is cast or changed; NULL on rows from before the column
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
-    _table_args_ = (
-        db.UniqueConstraint('user_id', 'question_id', name='unique_user_question_vote'),
-        db.UniqueConstraint('user_id', 'answer_id', name='unique_user_answer_vote'),
+    # Unique indexes rather than constraints so sync-schema can add them to
+    # existing tables; vote upserts target them with ON CONFLICT
+    __table_args__ = (
+        db.Index('unique_user_question_vote', 'user_id', 'question_id', unique=True),
+        db.Index('unique_user_answer_vote', 'user_id', 'answer_id', unique=True),
     )
     
     def to_dict(self):
@@ -147,6 +247,7 @@ class Tag(db.Model):
     name = db.Column(db.String(50), unique=True, nullable=False, index=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # active questions
     
     def to_dict(self):
         return {
@@ -154,7 +255,7 @@ class Tag(db.Model):
             'name': self.name,
             'description': self.description,
             'created_at': self.created_at.isoformat(),
-            'question_count': len(self.questions)
+            'question_count': self.question_count or 0
         }
 
 class Notification(db.Model):
@@ -166,6 +267,10 @@ class Notification(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    __table_args__ = (
+        db.Index('ix_notification_user_created', 'user_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -174,4 +279,19 @@ class Notification(db.Model):
             'data': self.data,
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+class VoteDeletion(db.Model):
+    """A removed vote, kept so incremental exports can report the removal"""
+    id = db.Column(db.Integer, primary_key=True)
+    vote_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    question_id = db.Column(db.Integer, nullable=True)
+    answer_id = db.Column(db.Integer, nullable=True)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class TokenRevocation(db.Model):
+    """Tokens for user_id issued with a version below min_version are revoked"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    min_version = db.Column(db.Integer, nullable=False)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,162 @@
+"""
+Asynchronous notification pipeline
+Notifications are queued in-process and bulk-inserted by a background worker,
+so write endpoints don't pay for a second transaction.
+"""
+
+import atexit
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, func, select
+
+from models import db, User, Notification
+
+
+class NotificationQueue:
+    def __init__(self, app=None):
+        self.app = None
+        self.async_mode = True
+        self.batch_size = 500
+        self.flush_interval = 1.0
+        self.max_retries = 5
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'retries': 0, 'dropped': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.async_mode = app.config.get('NOTIFICATIONS_ASYNC', self.async_mode)
+        self.batch_size = app.config.get('NOTIFICATION_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('NOTIFICATION_FLUSH_INTERVAL', self.flush_interval)
+        self.max_retries = app.config.get('NOTIFICATION_MAX_RETRIES', self.max_retries)
+        app.extensions['notification_queue'] = self
+
+    def enqueue(self, user_id, notification_type, message, data=None):
+        """Queue a notification for the background writer"""
+        self._queue.put({
+            'user_id': user_id,
+            'type': notification_type,
+            'message': message,
+            'data': data or {},
+            'is_read': False,
+            'created_at': datetime.utcnow()
+        })
+        self.stats['queued'] += 1
+        self._ensure_worker()
+
+    def flush(self):
+        """Write everything queued so far (used at shutdown and by tests)"""
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                return
+            self._write_with_retry(batch)
+
+    def get_status(self):
+        return {'pending': self._queue.qsize(), 'async': self.async_mode, **self.stats}
+
+    def _take_batch(self, block=True):
+        batch = []
+        try:
+            batch.append(self._queue.get(block=block, timeout=self.flush_interval if block else None))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write_with_retry(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write(batch)
+                return True
+            except Exception:
+                if attempt == self.max_retries:
+                    self.app.logger.exception(
+                        'Dropping %d notifications after %d retries', len(batch), attempt
+                    )
+                    self.stats['dropped'] += len(batch)
+                    return False
+                self.stats['retries'] += 1
+                time.sleep(min(0.1 * 2 ** attempt, 5))
+
+    def _write(self, batch):
+        # One writer at a time keeps the worker and shutdown flush from interleaving
+        with self._write_lock, self.app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(Notification.__table__.insert(), batch)
+                update_unread_counts(conn, Counter(row['user_id'] for row in batch))
+        self.stats['written'] += len(batch)
+        self.stats['batches'] += 1
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='notification-writer', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write_with_retry(batch)
+
+
+def update_unread_counts(executor, deltas):
+    """Adjust users' unread counters by {user_id: delta} on a session or connection"""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    table = User.__table__
+    adjusted = table.c.unread_notifications + bindparam('delta')
+    executor.execute(
+        table.update()
+        .where(table.c.id == bindparam('user_id'))
+        .values(unread_notifications=case((adjusted < 0, 0), else_=adjusted)),
+        [{'user_id': user_id, 'delta': delta} for user_id, delta in deltas.items()]
+    )
+
+
+def mark_notifications_read(session, user_id, notification_ids):
+    """Mark a user's notifications read in one statement; returns the ids they own"""
+    if not notification_ids:
+        return set()
+    owned = set(session.execute(select(Notification.id).where(
+        Notification.user_id == user_id, Notification.id.in_(notification_ids)
+    )).scalars())
+    if owned:
+        # Only unread rows count, so replays don't decrement the counter twice
+        marked = session.execute(
+            Notification.__table__.update()
+            .where(Notification.id.in_(owned), Notification.is_read == False)
+            .values(is_read=True)
+        ).rowcount
+        update_unread_counts(session, {user_id: -marked})
+    return owned
+
+
+def reconcile_unread_counts():
+    """Recompute every user's unread counter from the notification table"""
+    unread = select(func.count(Notification.id)).where(
+        Notification.user_id == User.id, Notification.is_read == False
+    ).scalar_subquery()
+    count = User.query.update({User.unread_notifications: unread}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+notification_queue = NotificationQueue()
@@ -0,0 +1,68 @@
+"""
+Keyset (cursor) pagination
+Seeks past the last row of the previous page instead of using OFFSET, so
+every page costs the same no matter how deep the client scrolls.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import bindparam, tuple_, DateTime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_key, values):
+    """Pack the sort key and the last row's key values into an opaque token"""
+    payload = json.dumps({
+        's': sort_key,
+        'v': [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    }, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_key, columns):
+    """Unpack a cursor produced by encode_cursor for the same sort key"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+        if payload['s'] != sort_key or len(values) != len(columns):
+            raise InvalidCursor('Cursor does not match the requested sort')
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except InvalidCursor:
+        raise
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def keyset_paginate(query, columns, sort_key, cursor=None, per_page=20, descending=True):
+    """Fetch one page ordered by `columns` (the last one must be unique).
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursor for a malformed or mismatched cursor.
+    """
+    if cursor:
+        values = decode_cursor(cursor, sort_key, columns)
+        seek = tuple_(*columns)
+        after = tuple_(*[
+            bindparam(None, value, type_=column.type) for column, value in zip(columns, values)
+        ])
+        query = query.filter(seek < after if descending else seek > after)
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    rows = query.limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(sort_key, [getattr(last, column.key) for column in columns])
+
+    return items, next_cursor
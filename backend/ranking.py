@@ -0,0 +1,184 @@
+"""
+Hot and trending question rankings
+Both ranks are stored on the question and indexed, so sort=hot and
+sort=trending are plain index scans:
+
+  hot_score       log10 of weighted activity plus creation time / HOT_DECAY.
+                  The time term is absolute, so hot never needs re-decaying;
+                  a question needs 10x the activity to keep level with one
+                  posted HOT_DECAY seconds later.
+  trending_score  weighted activity / (age in hours + 2) ** TRENDING_GRAVITY
+                  for questions inside the trending window, 0 outside it.
+                  It falls as questions age, so a background job re-decays it.
+
+Write endpoints refresh the ranks of the questions they touch in the same
+transaction.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select
+
+from models import db, Question, Answer
+
+# Fixed origin for the hot time term, keeps the stored numbers small
+HOT_EPOCH = datetime(2024, 1, 1)
+
+
+class Ranking:
+    def __init__(self, app=None):
+        self.app = None
+        self.weights = {'votes': 1.0, 'answers': 2.0, 'views': 0.05}
+        self.hot_decay = 45000
+        self.trending_gravity = 1.8
+        self.trending_window = timedelta(days=7)
+        self.redecay_interval = 300
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'refreshed': 0, 'redecays': 0, 'failures': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.weights = {**self.weights, **app.config.get('RANKING_WEIGHTS', {})}
+        self.hot_decay = app.config.get('HOT_DECAY_SECONDS', self.hot_decay)
+        self.trending_gravity = app.config.get('TRENDING_GRAVITY', self.trending_gravity)
+        self.trending_window = timedelta(
+            days=app.config.get('TRENDING_WINDOW_DAYS', self.trending_window.days)
+        )
+        self.redecay_interval = app.config.get('RANKING_REDECAY_INTERVAL', self.redecay_interval)
+        app.extensions['ranking'] = self
+        self.start()
+
+    def activity(self, score, answers, views):
+        weights = self.weights
+        return (score or 0) * weights['votes'] + answers * weights['answers'] \
+            + (views or 0) * weights['views']
+
+    def hot(self, activity, created_at):
+        order = math.log10(max(abs(activity), 1))
+        sign = 1 if activity > 0 else -1 if activity < 0 else 0
+        return round(sign * order + (created_at - HOT_EPOCH).total_seconds() / self.hot_decay, 7)
+
+    def trending(self, activity, created_at, now):
+        if activity <= 0 or created_at < now - self.trending_window:
+            return 0.0
+        age_hours = max((now - created_at).total_seconds(), 0) / 3600
+        return activity / (age_hours + 2) ** self.trending_gravity
+
+    def refresh(self, executor, question_ids):
+        """Recompute the ranks of some questions on a session or connection"""
+        question_ids = set(question_ids)
+        if not question_ids:
+            return 0
+        rows = executor.execute(
+            self._rows_query().where(Question.__table__.c.id.in_(question_ids))
+        ).all()
+        self._write(executor, rows, datetime.utcnow())
+        self.stats['refreshed'] += len(rows)
+        return len(rows)
+
+    def redecay(self):
+        """Recompute trending for the window and zero questions that left it"""
+        table = Question.__table__
+        now = datetime.utcnow()
+        cutoff = now - self.trending_window
+        with db.engine.begin() as conn:
+            rows = conn.execute(self._rows_query().where(table.c.created_at >= cutoff)).all()
+            self._write(conn, rows, now)
+            conn.execute(
+                table.update()
+                .where(table.c.created_at < cutoff, table.c.trending_score != 0)
+                .values(trending_score=0, updated_at=table.c.updated_at)
+            )
+        self.stats['redecays'] += 1
+        return len(rows)
+
+    def rebuild(self, chunk_size=5000):
+        """Recompute both ranks for every question"""
+        table = Question.__table__
+        now = datetime.utcnow()
+        count = 0
+        last_id = 0
+        while True:
+            with db.engine.begin() as conn:
+                rows = conn.execute(
+                    self._rows_query().where(table.c.id > last_id)
+                    .order_by(table.c.id).limit(chunk_size)
+                ).all()
+                if not rows:
+                    return count
+                self._write(conn, rows, now)
+            count += len(rows)
+            last_id = rows[-1].id
+
+    def get_status(self):
+        return {
+            'weights': self.weights,
+            'hot_decay': self.hot_decay,
+            'trending_gravity': self.trending_gravity,
+            'trending_window_days': self.trending_window.days,
+            'redecay_interval': self.redecay_interval,
+            **self.stats
+        }
+
+    def start(self):
+        """Start the background re-decay job unless it's running or disabled"""
+        if self._thread is not None or self.app is None or not self.redecay_interval:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='ranking-redecay', daemon=True)
+            self._thread.start()
+
+    def _rows_query(self):
+        table = Question.__table__
+        answers = Answer.__table__
+        answer_count = select(func.count(answers.c.id)).where(
+            answers.c.question_id == table.c.id, answers.c.is_active == True
+        ).scalar_subquery()
+        return select(
+            table.c.id, table.c.score, table.c.views, table.c.created_at,
+            answer_count.label('answers')
+        )
+
+    def _write(self, executor, rows, now):
+        if not rows:
+            return
+        params = []
+        for row in rows:
+            created_at = row.created_at or now
+            activity = self.activity(row.score, row.answers, row.views)
+            params.append({
+                'question_id': row.id,
+                'hot': self.hot(activity, created_at),
+                'trending': self.trending(activity, created_at, now)
+            })
+        table = Question.__table__
+        executor.execute(
+            table.update().where(table.c.id == bindparam('question_id'))
+            .values(
+                hot_score=bindparam('hot'),
+                trending_score=bindparam('trending'),
+                updated_at=table.c.updated_at  # re-ranking isn't an edit; skip onupdate
+            ),
+            params
+        )
+
+    def _run(self):
+        while True:
+            time.sleep(self.redecay_interval)
+            try:
+                with self.app.app_context():
+                    self.redecay()
+            except Exception:
+                self.stats['failures'] += 1
+                self.app.logger.exception('Trending re-decay failed')
+
+
+ranking = Ranking()
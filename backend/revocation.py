@@ -0,0 +1,81 @@
+"""
+JWT revocation list
+Bans and role changes bump a user's token version and record the minimum valid version in a
+small table; every process keeps the table in memory so token checks need no
+query per request.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models import db, TokenRevocation
+
+
+class RevocationList:
+    def __init__(self, app=None, jwt=None):
+        self.refresh_interval = 5
+        self.sync_overlap = timedelta(seconds=60)
+        self._min_versions = {}
+        self._synced_until = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        self.refresh_interval = app.config.get('REVOCATION_REFRESH_INTERVAL', self.refresh_interval)
+        self.sync_overlap = timedelta(seconds=app.config.get('REVOCATION_SYNC_OVERLAP', 60))
+        self._min_versions = {}
+        self._synced_until = None
+        self._checked_at = None
+        app.extensions['revocation_list'] = self
+
+        @jwt.token_in_blocklist_loader
+        def check_if_token_revoked(jwt_header, jwt_payload):
+            return self.is_revoked(jwt_payload['sub'], jwt_payload.get('ver', 0))
+
+    def is_revoked(self, user_id, version):
+        self._sync()
+        return version < self._min_versions.get(user_id, 0)
+
+    def revoke(self, user, session=None):
+        """Stage revocation of every token issued to a user so far.
+
+        Call remember() after the commit so this process applies it at once;
+        other processes pick it up on their next sync.
+        """
+        user.token_version = (user.token_version or 0) + 1
+        (session or db.session).merge(TokenRevocation(
+            user_id=user.id, min_version=user.token_version, revoked_at=datetime.utcnow()
+        ))
+
+    def remember(self, user_id, min_version):
+        with self._lock:
+            self._min_versions[user_id] = max(self._min_versions.get(user_id, 0), min_version)
+
+    def _sync(self):
+        """Pull revocations recorded since the last sync, at most once per interval"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+
+        query = db.session.query(
+            TokenRevocation.user_id, TokenRevocation.min_version, TokenRevocation.revoked_at
+        )
+        if self._synced_until is not None:
+            # revoked_at is stamped by the app before the commit, so a slow
+            # transaction (or another server's clock) can commit a row older
+            # than ones already synced; re-read a window to catch it. Applying
+            # a revocation twice is harmless.
+            query = query.filter(TokenRevocation.revoked_at >= self._synced_until - self.sync_overlap)
+
+        with self._lock:
+            for user_id, min_version, revoked_at in query:
+                self._min_versions[user_id] = max(self._min_versions.get(user_id, 0), min_version)
+                if self._synced_until is None or revoked_at > self._synced_until:
+                    self._synced_until = revoked_at
+
+
+revocation_list = RevocationList()
@@ -8,6 +8,7 @@ import os
 from dotenv import load_dotenv
 from app import create_app
 from models import db, User
+from search import ensure_search_index
 
 # Load environment variables
 load_dotenv()
@@ -19,6 +20,7 @@ if __name__ == '__main__':
     with app.app_context():
         # Create tables if they don't exist
         db.create_all()
+        ensure_search_index()
         
         # Create default admin if it doesn't exist
         admin = User.query.filter_by(username='admin').first()
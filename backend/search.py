@@ -0,0 +1,156 @@
+"""
+Full-text search for questions
+Backed by an SQLite FTS5 table kept in step with the question table
+"""
+
+import html
+import re
+
+import bleach
+from sqlalchemy import bindparam, text
+
+from models import db, Question
+
+FTS_TABLE = 'question_fts'
+
+# Title matches count for more than description matches when ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Private-use characters marking snippet matches until the snippet is escaped;
+# stripped from indexed text so user content can't forge them
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+_available = {}
+
+
+def html_to_text(content):
+    """Strip markup from sanitized HTML, leaving searchable text"""
+    stripped = bleach.clean(content or '', tags=[], strip=True)
+    plain = html.unescape(stripped).replace(MARK_OPEN, '').replace(MARK_CLOSE, '')
+    return re.sub(r'\s+', ' ', plain).strip()
+
+
+def build_match_query(search):
+    """Turn free-form user input into a safe FTS5 MATCH expression.
+
+    Every word must match; the last one is treated as a prefix so results
+    follow the user as they type.
+    """
+    terms = re.findall(r'\w+', search.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_available():
+    """Check whether the FTS index exists for the current database"""
+    engine = db.engine
+    if engine.url not in _available:
+        _available[engine.url] = engine.dialect.name == 'sqlite' and _index_exists()
+    return _available[engine.url]
+
+
+def ensure_search_index():
+    """Create and fill the FTS index if the database does not have one yet"""
+    if db.engine.dialect.name == 'sqlite' and not _index_exists():
+        rebuild_search_index()
+
+
+def rebuild_search_index():
+    """Drop and repopulate the FTS index from the question table"""
+    db.session.execute(text(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+    db.session.execute(text(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"title, body, tokenize = 'porter unicode61')"
+    ))
+
+    # Chunked by id so large tables aren't loaded into memory at once
+    count = 0
+    last_id = 0
+    while True:
+        rows = Question.query.with_entities(Question.id, Question.title, Question.description)\
+            .filter(Question.is_active == True, Question.id > last_id)\
+            .order_by(Question.id).limit(1000).all()
+        if not rows:
+            break
+        _insert([
+            {'id': question_id, 'title': title, 'body': html_to_text(description)}
+            for question_id, title, description in rows
+        ])
+        count += len(rows)
+        last_id = rows[-1][0]
+
+    db.session.commit()
+    _available[db.engine.url] = True
+    return count
+
+
+def index_question(question):
+    """Add or refresh a question in the index (within the current transaction)"""
+    if not search_available():
+        return
+    remove_question(question.id)
+    if question.is_active:
+        _insert({
+            'id': question.id,
+            'title': question.title,
+            'body': html_to_text(question.description)
+        })
+
+
+def remove_question(question_id):
+    """Drop a question from the index (within the current transaction)"""
+    if not search_available():
+        return
+    db.session.execute(
+        text(f'DELETE FROM {FTS_TABLE} WHERE rowid = :id'), {'id': question_id}
+    )
+
+
+def match_subquery(match):
+    """Selectable of (question_id, rank) rows for a MATCH expression"""
+    return text(
+        f'SELECT rowid AS question_id, '
+        f'bm25({FTS_TABLE}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match'
+    ).bindparams(match=match).columns(
+        db.column('question_id', db.Integer), db.column('rank', db.Float)
+    ).subquery('fts')
+
+
+def get_snippets(match, question_ids):
+    """Highlighted description snippets for a page of matching questions.
+
+    The indexed text is unescaped, so snippets are HTML-escaped here and only
+    the highlight markers become markup.
+    """
+    if not question_ids:
+        return {}
+    rows = db.session.execute(text(
+        f"SELECT rowid, snippet({FTS_TABLE}, -1, :open, :close, '…', 16) "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match AND rowid IN :ids"
+    ).bindparams(bindparam('ids', expanding=True)), {
+        'match': match, 'ids': list(question_ids), 'open': MARK_OPEN, 'close': MARK_CLOSE
+    })
+    return {
+        question_id: html.escape(snippet).replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+        for question_id, snippet in rows
+    }
+
+
+def _index_exists():
+    return db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first() is not None
+
+
+def _insert(params):
+    db.session.execute(
+        text(f'INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)'),
+        params
+    )
@@ -0,0 +1,70 @@
+"""
+Database engine tuning
+Connection pool settings (DB_POOL_*) and SQLite pragmas (SQLITE_PRAGMAS)
+from config. Pragmas are run on every new DBAPI connection through the
+engine's connect event, so each pooled connection gets the same profile.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+# Config key -> create_engine() argument
+POOL_SETTINGS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+}
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    )
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS with the pool settings filled in"""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # In-memory SQLite uses a single shared connection, not a sized pool
+    if _is_sqlite_memory(make_url(config['SQLALCHEMY_DATABASE_URI'])):
+        return options
+    for key, argument in POOL_SETTINGS.items():
+        if config.get(key) is not None:
+            options.setdefault(argument, config[key])
+    return options
+
+
+def apply_sqlite_pragmas(app):
+    """Run SQLITE_PRAGMAS on each new connection to a SQLite database"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def get_status():
+    """Effective pragmas and pool state, for the admin endpoint"""
+    engine = db.engine
+    status = {'dialect': engine.dialect.name, 'pool': engine.pool.status()}
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as conn:
+            status['pragmas'] = {
+                name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+                for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size')
+            }
+    return status
@@ -0,0 +1,174 @@
+"""
+In-memory tag autocomplete index
+A sorted array of (lower-cased name, name) pairs searched with bisect, holding
+each tag's serialized form including its maintained question count.
+"""
+
+import bisect
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Tag, question_tags
+
+
+class TagIndex:
+    def __init__(self, app=None):
+        self.app = None
+        self.refresh_interval = 60
+        self._names = []
+        self._tags = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.refresh_interval = app.config.get('TAG_INDEX_REFRESH_INTERVAL', self.refresh_interval)
+        self._loaded_at = None
+        clear_tag_ids()
+        app.extensions['tag_index'] = self
+
+    def search(self, prefix='', limit=50):
+        """Tags whose name starts with prefix (case-insensitive), by name"""
+        self._ensure_loaded()
+        prefix = prefix.lower()
+        with self._lock:
+            names, tags = self._names, self._tags
+        results = []
+        for i in range(bisect.bisect_left(names, (prefix,)), len(names)):
+            if len(results) >= limit or not names[i][0].startswith(prefix):
+                break
+            results.append(tags[names[i][1]])
+        return results
+
+    def refresh_tags(self, tag_ids):
+        """Reload specific tags (new names or changed counts) after a commit"""
+        tag_ids = set(tag_ids)
+        if not tag_ids or self._loaded_at is None:
+            return
+        tags = Tag.query.filter(Tag.id.in_(tag_ids)).all()
+        with self._lock:
+            # Copy on write so searches in flight keep a consistent array
+            names, entries = list(self._names), dict(self._tags)
+            for tag in tags:
+                if tag.name not in entries:
+                    bisect.insort(names, (tag.name.lower(), tag.name))
+                entries[tag.name] = tag.to_dict()
+            self._names, self._tags = names, entries
+
+    def reload(self):
+        """Rebuild the whole index from the tag table"""
+        tags = {tag.name: tag.to_dict() for tag in Tag.query.all()}
+        with self._lock:
+            self._names = sorted((name.lower(), name) for name in tags)
+            self._tags = tags
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        # Periodic reloads pick up changes made by other processes
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.reload()
+
+
+# Process-wide database URL -> {tag name: id} cache; tags are never deleted,
+# so ids stay valid until the database itself is recreated
+_tag_ids = {}
+_tag_ids_lock = threading.Lock()
+
+
+def clear_tag_ids():
+    """Forget cached tag ids, e.g. after the tables were dropped and recreated"""
+    with _tag_ids_lock:
+        _tag_ids.clear()
+
+
+def resolve_tag_ids(names):
+    """Map tag names to ids, creating missing tags, with a constant number of queries.
+
+    Known names come from the cache; the rest are looked up with one IN query
+    and any still missing are inserted with a single insert-or-ignore, so a
+    tag created concurrently by another request is simply picked up.
+    """
+    names = list(dict.fromkeys(names))
+    with _tag_ids_lock:
+        cached = _tag_ids.setdefault(str(db.engine.url), {})
+        ids = {name: cached[name] for name in names if name in cached}
+
+    missing = [name for name in names if name not in ids]
+    if missing:
+        found = dict(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(missing)))
+        # Only committed tags go in the cache; new ones could still roll back
+        with _tag_ids_lock:
+            cached.update(found)
+
+        new_names = [name for name in missing if name not in found]
+        if new_names:
+            now = datetime.utcnow()
+            db.session.execute(_insert_ignore(Tag.__table__), [
+                {'name': name, 'created_at': now, 'question_count': 0} for name in new_names
+            ])
+            found.update(db.session.query(Tag.name, Tag.id).filter(Tag.name.in_(new_names)))
+        ids.update(found)
+
+    return [ids[name] for name in names]
+
+
+def _insert_ignore(table):
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=['name'])
+    if dialect == 'postgresql':
+        return postgresql_insert(table).on_conflict_do_nothing(index_elements=['name'])
+    return table.insert().prefix_with('IGNORE')
+
+
+def set_question_tags(question_id, old_tag_ids, new_tag_ids):
+    """Write only the association rows that changed"""
+    added = set(new_tag_ids) - set(old_tag_ids)
+    removed = set(old_tag_ids) - set(new_tag_ids)
+    if removed:
+        db.session.execute(question_tags.delete().where(
+            question_tags.c.question_id == question_id, question_tags.c.tag_id.in_(removed)
+        ))
+    if added:
+        db.session.execute(question_tags.insert(), [
+            {'question_id': question_id, 'tag_id': tag_id} for tag_id in added
+        ])
+
+
+def tag_count_deltas(old_tag_ids, new_tag_ids):
+    """Per-tag question count changes when a question's tags change"""
+    old_tag_ids, new_tag_ids = set(old_tag_ids), set(new_tag_ids)
+    deltas = {tag_id: 1 for tag_id in new_tag_ids - old_tag_ids}
+    deltas.update({tag_id: -1 for tag_id in old_tag_ids - new_tag_ids})
+    return deltas
+
+
+def update_tag_counts(deltas):
+    """Apply question count deltas within the current transaction"""
+    for delta in (1, -1):
+        tag_ids = [tag_id for tag_id, value in deltas.items() if value == delta]
+        if tag_ids:
+            Tag.query.filter(Tag.id.in_(tag_ids)).update(
+                {Tag.question_count: Tag.question_count + delta}, synchronize_session=False
+            )
+
+
+def reconcile_tag_counts():
+    """Recompute every tag's active question count from the association table"""
+    result = db.session.execute(text(
+        'UPDATE tag SET question_count = ('
+        'SELECT COUNT(*) FROM question_tags JOIN question ON question.id = question_tags.question_id '
+        'WHERE question_tags.tag_id = tag.id AND question.is_active)'
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+tag_index = TagIndex()
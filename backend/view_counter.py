@@ -0,0 +1,143 @@
+"""
+Write-behind view counter
+Buffers question view increments in memory and flushes them in batches
+"""
+
+import atexit
+import threading
+
+from sqlalchemy import bindparam, func
+
+from models import db, Question
+from ranking import ranking
+
+
+class ViewCounter:
+    """Per-process buffer of pending question views.
+
+    Views are flushed as one batched UPDATE by a background thread every
+    `flush_interval` seconds, or as soon as `max_pending` views are waiting.
+    `max_pending` is roughly the most views a crash can lose; set it to 1
+    to write every view through on the request thread.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 5.0
+        self.max_pending = 1000
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.stats = {'recorded': 0, 'flushed': 0, 'flushes': 0, 'failures': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.configure(
+            flush_interval=app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', self.flush_interval),
+            max_pending=app.config.get('VIEW_COUNTER_MAX_PENDING', self.max_pending)
+        )
+        app.extensions['view_counter'] = self
+
+    def configure(self, flush_interval=None, max_pending=None):
+        if flush_interval is not None:
+            self.flush_interval = max(float(flush_interval), 0.1)
+        if max_pending is not None:
+            self.max_pending = max(int(max_pending), 1)
+        self._wakeup.set()
+
+    def record(self, question_id):
+        """Count one view of a question"""
+        with self._lock:
+            self._pending[question_id] = self._pending.get(question_id, 0) + 1
+            self._pending_total += 1
+            self.stats['recorded'] += 1
+            should_flush = self._pending_total >= self.max_pending
+
+        if should_flush and self.max_pending == 1:
+            # Write-through mode
+            self.flush()
+            return
+        self._ensure_worker()
+        if should_flush:
+            # Hand the full buffer to the worker; the request never writes
+            self._wakeup.set()
+
+    def pending(self, question_id):
+        """Views recorded for a question but not yet written"""
+        with self._lock:
+            return self._pending.get(question_id, 0)
+
+    def flush(self):
+        """Write all buffered views in one batched UPDATE"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._pending_total = 0
+
+        if not batch or self.app is None:
+            return 0
+
+        table = Question.__table__
+        statement = table.update()\
+            .where(table.c.id == bindparam('question_id'))\
+            .values(
+                views=func.coalesce(table.c.views, 0) + bindparam('increment'),
+                updated_at=table.c.updated_at  # a view isn't an edit; skip onupdate
+            )
+
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as conn:
+                    conn.execute(statement, [
+                        {'question_id': question_id, 'increment': increment}
+                        for question_id, increment in batch.items()
+                    ])
+                    # Views feed the hot/trending ranks
+                    ranking.refresh(conn, batch)
+        except Exception:
+            # Put the views back so the next flush retries them
+            with self._lock:
+                for question_id, increment in batch.items():
+                    self._pending[question_id] = self._pending.get(question_id, 0) + increment
+                    self._pending_total += increment
+                self.stats['failures'] += 1
+            return 0
+
+        with self._lock:
+            self.stats['flushed'] += sum(batch.values())
+            self.stats['flushes'] += 1
+        return len(batch)
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'flush_interval': self.flush_interval,
+                'max_pending': self.max_pending,
+                'pending_views': self._pending_total,
+                'pending_questions': len(self._pending),
+                **self.stats
+            }
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='view-counter-flush', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,162 @@
+"""
+Vote writes
+A vote is one upsert on the (user, question) or (user, answer) unique index,
+with the stored score adjusted in the same transaction. Removed votes are
+logged in vote_deletion so incremental exports can report them.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, bindparam, func, literal, select, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, Question, Answer, Vote, VoteDeletion
+
+# Target model -> foreign key column on the vote table
+TARGETS = {Question: 'question_id', Answer: 'answer_id'}
+
+
+def _score_update(model, user_id):
+    # Move the score by the new value minus the user's stored vote (0 if none),
+    # reading the old vote inside the UPDATE that takes the write lock
+    fk = TARGETS[model]
+    table = Vote.__table__
+    target = model.__table__
+    previous = select(table.c.value).where(
+        table.c.user_id == user_id, table.c[fk] == target.c.id
+    ).scalar_subquery()
+    return target.update().where(target.c.id == bindparam('target_id')).values(
+        score=target.c.score + bindparam('new_value') - func.coalesce(previous, 0),
+        updated_at=target.c.updated_at,  # a vote isn't an edit; skip onupdate
+        voted_at=datetime.utcnow()  # ...but it does change the response (Last-Modified)
+    )
+
+
+def cast_vote(user_id, model, target_id, value):
+    """Set a user's vote on a question or answer; value None removes it.
+
+    Returns the target's new score, or None if the target doesn't exist.
+    The caller commits.
+    """
+    fk = TARGETS[model]
+    table = Vote.__table__
+    params = {'target_id': target_id, 'new_value': value or 0}
+    if db.engine.dialect.update_returning:
+        score = db.session.execute(
+            _score_update(model, user_id).returning(model.__table__.c.score), params
+        ).scalar()
+    else:
+        db.session.execute(_score_update(model, user_id), params)
+        score = db.session.execute(
+            select(model.__table__.c.score).where(model.__table__.c.id == target_id)
+        ).scalar()
+    if score is None:
+        return None
+
+    if value is None:
+        _delete(table, table.c.user_id == user_id, table.c[fk] == target_id)
+    else:
+        now = datetime.utcnow()
+        _upsert(table, fk, [
+            {'user_id': user_id, fk: target_id, 'value': value, 'created_at': now, 'updated_at': now}
+        ])
+    return score
+
+
+def cast_votes(user_id, model, votes):
+    """Apply one user's votes on many questions or answers with bulk statements.
+
+    votes maps target id -> value (None removes the vote). Returns
+    {target_id: new score} for the targets that exist. The caller commits.
+    """
+    fk = TARGETS[model]
+    table = Vote.__table__
+    target = model.__table__
+    if not votes:
+        return {}
+
+    existing = set(db.session.execute(
+        select(target.c.id).where(target.c.id.in_(votes))
+    ).scalars())
+    votes = {target_id: value for target_id, value in votes.items() if target_id in existing}
+    if not votes:
+        return {}
+
+    db.session.execute(_score_update(model, user_id), [
+        {'target_id': target_id, 'new_value': value or 0} for target_id, value in votes.items()
+    ])
+
+    removed = [target_id for target_id, value in votes.items() if value is None]
+    if removed:
+        _delete(table, table.c.user_id == user_id, table.c[fk].in_(removed))
+    now = datetime.utcnow()
+    upserts = [
+        {'user_id': user_id, fk: target_id, 'value': value, 'created_at': now, 'updated_at': now}
+        for target_id, value in votes.items() if value is not None
+    ]
+    if upserts:
+        _upsert(table, fk, upserts)
+
+    return dict(db.session.execute(
+        select(target.c.id, target.c.score).where(target.c.id.in_(votes))
+    ).all())
+
+
+def _delete(table, *conditions):
+    """Delete votes, logging them in vote_deletion for incremental exports"""
+    log = VoteDeletion.__table__
+    db.session.execute(log.insert().from_select(
+        ['vote_id', 'user_id', 'question_id', 'answer_id', 'deleted_at'],
+        select(
+            table.c.id, table.c.user_id, table.c.question_id, table.c.answer_id,
+            literal(datetime.utcnow(), DateTime)
+        ).where(*conditions)
+    ))
+    db.session.execute(table.delete().where(*conditions))
+
+
+def _upsert(table, fk, rows):
+    """Insert votes, or update value and updated_at where the user already voted"""
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table)
+        statement = insert.on_conflict_do_update(
+            index_elements=['user_id', fk],
+            set_={'value': insert.excluded.value, 'updated_at': insert.excluded.updated_at}
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        insert = mysql_insert(table)
+        statement = insert.on_duplicate_key_update(
+            value=insert.inserted.value, updated_at=insert.inserted.updated_at
+        )
+    else:
+        # Update, then insert where nothing matched; the unique index still
+        # rejects a concurrent duplicate
+        for row in rows:
+            result = db.session.execute(
+                table.update()
+                .where(table.c.user_id == row['user_id'], table.c[fk] == row[fk])
+                .values(value=row['value'], updated_at=row['updated_at'])
+            )
+            if result.rowcount == 0:
+                db.session.execute(table.insert().values(**row))
+        return
+    db.session.execute(statement, rows)
+
+
+def dedupe_votes():
+    """Delete duplicate votes left from before the unique indexes, keeping the latest.
+
+    Returns the number of rows removed per target column.
+    """
+    removed = {}
+    for fk in TARGETS.values():
+        result = db.session.execute(text(
+            f'DELETE FROM vote WHERE {fk} IS NOT NULL AND id NOT IN '
+            f'(SELECT MAX(id) FROM vote WHERE {fk} IS NOT NULL GROUP BY user_id, {fk})'
+        ))
+        removed[fk] = result.rowcount
+    db.session.commit()
+    return removed